@@ -0,0 +1,162 @@
+import argparse
+import collections
+import itertools
+import json
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from catalog import COMPONENTS
+from propagation import Propagator
+from tree_solver import TreeSolver
+from utils import load_catalog
+
+# Outputs a request can ask for
+OUTPUTS = ("options", "cheapest", "count", "top_k")
+
+# Catalog of the current process. Loaded once in the parent before the pool starts, so
+# forked workers inherit it (and its compatibility relations) instead of reloading it.
+_catalog = None
+
+
+def loaded_catalog(data_dir="data"):
+    """Returns the catalog of the current process, loaded on first use."""
+    global _catalog
+    if _catalog is None:
+        _catalog = load_catalog(data_dir)
+    return _catalog
+
+
+def _init_worker(data_dir, initializer, initargs):
+    loaded_catalog(data_dir)
+    if initializer is not None:
+        initializer(*initargs)
+
+
+def process_pool(workers=None, data_dir="data", initializer=None, initargs=()):
+    """
+    Returns a pool of processes sharing the catalog of the current process (loaded first
+    if needed). Fork shares it with the workers; other start methods load it from the
+    compiled file. `initializer(*initargs)` then runs in every worker.
+    """
+    catalog = loaded_catalog(data_dir)
+    # The lazy views the requests read are built before the fork, so the workers inherit them
+    for component in COMPONENTS:
+        catalog.position[component], catalog.rows[component]
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("fork" if "fork" in methods else None)
+    return ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                               initializer=_init_worker, initargs=(data_dir, initializer, initargs))
+
+
+def solve_request(request, catalog):
+    """
+    Answers one query on a loaded catalog.
+
+    A request is a dictionary with an optional "id", the fixed components ("selection",
+    component -> id), an optional "budget", the list of "outputs" wanted among
+    "options" (ids still available per component), "cheapest" (cheapest completion),
+    "count" (number of valid configurations matching the selection, budget ignored) and
+    "top_k" (the "k" cheapest configurations within the budget, 5 by default).
+    """
+    selection = {component: int(component_id) for component, component_id in request.get("selection", {}).items()}
+    budget = request.get("budget")
+    outputs = request.get("outputs", ["options", "cheapest"])
+    for component, component_id in selection.items():
+        if component not in COMPONENTS:
+            raise ValueError(f"unknown component {component!r}")
+        if component_id not in catalog.position[component]:
+            raise ValueError(f"unknown {component} id {component_id}")
+    for output in outputs:
+        if output not in OUTPUTS:
+            raise ValueError(f"unknown output {output!r}")
+
+    result = {"id": request.get("id")}
+    solver = TreeSolver(catalog, {component: [component_id] for component, component_id in selection.items()})
+    if "options" in outputs:
+        propagator = Propagator(catalog, solver.domains, budget=budget)
+        consistent = propagator.propagate()
+        result["options"] = {component: propagator.ids(component) if consistent else [] for component in COMPONENTS}
+    if "cheapest" in outputs:
+        result["cheapest"] = solver.cheapest(budget)
+    if "count" in outputs:
+        result["count"] = solver.count()
+    if "top_k" in outputs:
+        result["top_k"] = [
+            {"configuration": configuration, "cost": cost}
+            for cost, configuration in solver.top_k(budget, request.get("k", 5))
+        ]
+    return result
+
+
+def _solve(request):
+    if isinstance(request, Exception):
+        # Line that could not be parsed (see _read_requests)
+        return {"id": None, "error": str(request)}
+    try:
+        return solve_request(request, _catalog)
+    except Exception as error:
+        # One bad request (e.g. an infinite id) must not stop the batch
+        return {"id": request.get("id") if isinstance(request, dict) else None, "error": str(error)}
+
+
+def _solve_chunk(requests):
+    return [_solve(request) for request in requests]
+
+
+def run_batch(requests, workers=None, data_dir="data", chunksize=64):
+    """
+    Answers an iterable of requests with a pool of processes.
+    Yields the results in the order of the requests.
+
+    Requests are submitted in chunks of `chunksize`, with at most two chunks per process
+    in flight: the input is read as the results come out, so memory stays bounded and
+    results stream whatever the number of requests.
+    """
+    with process_pool(workers, data_dir) as executor:
+        requests = iter(requests)
+        in_flight = collections.deque()
+        for chunk in iter(lambda: list(itertools.islice(requests, chunksize)), []):
+            in_flight.append(executor.submit(_solve_chunk, chunk))
+            if len(in_flight) >= 2 * (workers or os.cpu_count()):
+                yield from in_flight.popleft().result()
+        while in_flight:
+            yield from in_flight.popleft().result()
+
+
+def _read_requests(f):
+    """
+    Yields the requests of a JSONL file. A line that is not valid JSON gives a ValueError
+    instead, answered with an error entry without stopping the batch.
+    """
+    for number, line in enumerate(f, start=1):
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as error:
+                yield ValueError(f"line {number}: invalid JSON ({error})")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Résolution non interactive de requêtes de configuration (JSONL).")
+    parser.add_argument("input", help="fichier JSONL de requêtes ('-' pour l'entrée standard)")
+    parser.add_argument("output", nargs="?", default="-", help="fichier JSONL de résultats ('-' pour la sortie standard)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="nombre de processus")
+    parser.add_argument("--data-dir", default="data", help="dossier des fichiers CSV")
+    args = parser.parse_args(argv)
+
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    target = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        for result in run_batch(_read_requests(source), workers=args.workers, data_dir=args.data_dir):
+            target.write(json.dumps(result, ensure_ascii=False) + "\n")
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if target is not sys.stdout:
+            target.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+import argparse
+import json
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from catalog import COMPONENTS, Catalog
+from catalog_cache import compile_catalog, load_cached_catalog, read_csv_files
+from generate_catalog import generate_catalog, write_catalog
+from propagation import Propagator
+from tree_solver import TreeSolver
+
+DEFAULT_SIZES = [10, 100, 1000, 10000, 100000]
+
+
+def _timed(function, *args, **kwargs):
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def benchmark_catalog(data_dir, budget_ratio=1.2, k=100):
+    """
+    Times every phase of both engines on the catalog of `data_dir`.
+    Returns a dictionary of wall times (seconds) and a few sizes for context.
+    """
+    results = {}
+
+    # Loading: CSV parsing, compilation, load from the compiled file
+    (records, columns), results["load_csv"] = _timed(read_csv_files, data_dir)
+    _, results["build_catalog"] = _timed(Catalog, records, columns)
+    _, results["compile"] = _timed(compile_catalog, data_dir)
+    catalog, results["load_compiled"] = _timed(load_cached_catalog, data_dir)
+
+    # Tree solver: counting, min-cost, cheapest completions, budget solving
+    solver, results["solver_tables"] = _timed(TreeSolver, catalog)
+    results["count"], results["solver_count"] = _timed(solver.count)
+    min_cost, results["solver_min_cost"] = _timed(solver.min_cost)
+    _, results["solver_completions"] = _timed(lambda: solver.completions)
+    results["min_cost"] = min_cost
+    if min_cost is not None:
+        budget = min_cost * budget_ratio
+        results["budget"] = budget
+        solutions, results["solver_top_k"] = _timed(lambda: list(solver.top_k(budget, k)))
+        results["top_k_found"] = len(solutions)
+
+    # MAC engine: initial propagation, one propagation per selection, budget propagation
+    propagator = Propagator(catalog)
+    _, results["mac_initial_propagation"] = _timed(propagator.propagate)
+    selection_times = []
+    for component in COMPONENTS:
+        ids = propagator.ids(component)
+        if not ids:
+            break
+        _, elapsed = _timed(propagator.assign, component, ids[0])
+        selection_times.append(elapsed)
+    results["mac_selection_propagation"] = selection_times
+    _, results["mac_undo_all"] = _timed(lambda: [propagator.undo() for _ in range(propagator.depth())])
+    if min_cost is not None:
+        budget_propagator = Propagator(catalog, budget=budget)
+        _, results["mac_budget_propagation"] = _timed(budget_propagator.propagate)
+        selection_times = []
+        for component in COMPONENTS:
+            ids = budget_propagator.ids(component)
+            if not ids:
+                break
+            _, elapsed = _timed(budget_propagator.assign, component, ids[0])
+            selection_times.append(elapsed)
+        results["mac_budget_selection_propagation"] = selection_times
+
+    # Incremental updates: one price tick and one added part, last since they modify the catalog
+    gpu_id = int(catalog.ids["GPU"][0])
+    _, results["solver_price_update"] = _timed(solver.update_price, "GPU", gpu_id, catalog.price("GPU", gpu_id) + 1)
+    new_row = dict(catalog.row("GPU", gpu_id), id=int(catalog.ids["GPU"].max()) + 1)
+    _, results["solver_add_row"] = _timed(solver.add_row, "GPU", new_row)
+    return results
+
+
+def run_benchmarks(sizes, densities, seed=0, budget_ratio=1.2, k=100):
+    """Yields one result dictionary per (size, density), on generated catalogs."""
+    for size in sizes:
+        for density in densities:
+            with tempfile.TemporaryDirectory() as data_dir:
+                write_catalog(generate_catalog(size, density, seed), data_dir)
+                results = benchmark_catalog(data_dir, budget_ratio, k)
+            yield {"size": size, "density": density, "seed": seed, **results}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mesure les performances des deux moteurs sur des catalogues synthétiques.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="composants par catégorie")
+    parser.add_argument("--densities", type=float, nargs="+", default=[0.5], help="densités de compatibilité")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--budget-ratio", type=float, default=1.2, help="budget = coût minimal x ratio")
+    parser.add_argument("-k", type=int, default=100, help="nombre de configurations du top-k budgétaire")
+    parser.add_argument("--output", default="-", help="fichier JSONL de résultats ('-' pour la sortie standard)")
+    args = parser.parse_args(argv)
+
+    target = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        for result in run_benchmarks(args.sizes, args.densities, args.seed, args.budget_ratio, args.k):
+            target.write(json.dumps(result, default=lambda v: v.item() if isinstance(v, np.generic) else str(v)) + "\n")
+            target.flush()
+    finally:
+        if target is not sys.stdout:
+            target.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,529 @@
+import ast
+import operator
+
+import numpy as np
+
+# Components in the order the configurators walk through them
+COMPONENTS = ["CPU", "Motherboard", "RAM", "GPU", "PSU", "Case"]
+
+# Safety margin applied to the GPU power draw when checking the PSU wattage
+SAFETY_MARGIN = 1.2
+
+# Columns holding a list of values, stored as strings in the CSV files
+LIST_COLUMNS = ["supported_motherboard_sizes", "supported_psu_sizes"]
+
+
+def _psu_powers_gpu(power_draw, wattage):
+    return power_draw * SAFETY_MARGIN <= wattage
+
+
+def _size_supported(size, supported_sizes):
+    return size in supported_sizes
+
+
+# Binary constraints of the problem (edges of the constraint graph).
+# Each edge compares one attribute of each component with a key predicate.
+CONSTRAINTS = {
+    ("CPU", "Motherboard"): ("socket", "socket", operator.eq),                             # Compatibilité socket
+    ("Motherboard", "RAM"): ("ram_type", "ram_type", operator.eq),                         # Type de mémoire supporté
+    ("Motherboard", "Case"): ("size", "supported_motherboard_sizes", _size_supported),     # Format supporté
+    ("PSU", "Case"): ("size", "supported_psu_sizes", _size_supported),                     # Format de l'alimentation
+    ("GPU", "PSU"): ("power_draw", "wattage", _psu_powers_gpu),                            # Alimentation suffisante pour le GPU
+}
+
+
+def parse_list(value):
+    """
+    Parses a list-valued CSV cell (e.g. "['ATX', 'Micro-ATX']") into a frozenset.
+    Missing cells give an empty set.
+    """
+    if isinstance(value, frozenset):
+        return value
+    if not isinstance(value, str):
+        return frozenset()
+    return frozenset(ast.literal_eval(value))
+
+
+def adjacent(component):
+    """Returns the components sharing a constraint with `component`."""
+    return [t for (s, t) in CONSTRAINTS if s == component] + [s for (s, t) in CONSTRAINTS if t == component]
+
+
+def _encode(values):
+    """
+    Encodes a list of hashable values as categorical codes.
+    Returns the list of distinct keys (in order of appearance) and the code of each value.
+    """
+    key_codes = {}
+    codes = np.empty(len(values), dtype=np.intp)
+    for i, value in enumerate(values):
+        codes[i] = key_codes.setdefault(value, len(key_codes))
+    return list(key_codes), codes
+
+
+def _pack(arrays, name, values):
+    """
+    Stores a list of CSV values as a NumPy array: numeric columns as they are,
+    text columns as unicode strings plus a mask of the missing cells.
+    """
+    if all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in values):
+        arrays[name] = np.array(values)
+    else:
+        missing = np.array([not isinstance(v, str) for v in values], dtype=bool)
+        arrays[name] = np.array([v if isinstance(v, str) else "" for v in values], dtype=str)
+        arrays[name + "/missing"] = missing
+
+
+def _unpack(arrays, name):
+    """Inverse of `_pack`: returns the list of values, missing text cells as NaN."""
+    values = arrays[name].tolist()
+    if name + "/missing" in arrays:
+        values = [float("nan") if missing else v for v, missing in zip(values, arrays[name + "/missing"].tolist())]
+    return values
+
+
+class _Views(dict):
+    """Per-component views of a catalog, each built by `build(component)` on first access."""
+
+    def __init__(self, build):
+        super().__init__()
+        self.build = build
+
+    def __missing__(self, component):
+        view = self[component] = self.build(component)
+        return view
+
+
+class Relation:
+    """
+    Compatibility relation of one constraint edge, oriented from `source` to `target`.
+
+    Rows are grouped by the attribute the constraint looks at (socket, size, wattage...),
+    so the relation is stored as a small key-level boolean matrix plus the key code of
+    every row. Row-level queries never build the full |source| x |target| matrix.
+    """
+
+    def __init__(self, source, target, source_codes, target_codes, key_matrix):
+        self.source = source
+        self.target = target
+        self.source_codes = source_codes
+        self.target_codes = target_codes
+        self.key_matrix = key_matrix
+        self._target_order = None
+        self._target_bounds = None
+
+    def reversed(self):
+        return Relation(self.target, self.source, self.target_codes, self.source_codes, self.key_matrix.T)
+
+    def compatible(self, source_pos, target_pos):
+        """Returns True if the two rows (given by position) are compatible."""
+        return bool(self.key_matrix[self.source_codes[source_pos], self.target_codes[target_pos]])
+
+    def neighbours(self, source_pos):
+        """Returns the positions of the target rows compatible with one source row."""
+        return np.flatnonzero(self.key_matrix[self.source_codes[source_pos]][self.target_codes])
+
+    def key_min(self, values, keys=None):
+        """
+        For each target key (only `keys` when given), minimum of `values` over its rows
+        and the position of the first row reaching it (inf and -1 for keys without finite values).
+        """
+        n_keys = self.key_matrix.shape[1]
+        key_min = np.full(n_keys, np.inf)
+        key_arg = np.full(n_keys, -1, dtype=np.intp)
+        order, bounds = self._grouped()
+        keys = np.arange(n_keys) if keys is None else np.asarray(keys, dtype=np.intp)
+        sizes = bounds[keys + 1] - bounds[keys]
+        keys, sizes = keys[sizes > 0], sizes[sizes > 0]
+        if not len(keys):
+            return key_min, key_arg
+
+        # Rows grouped key by key (in row order within a key): one reduction per group
+        rows = order if len(keys) == n_keys else self.target_rows(keys)
+        grouped = values[rows]
+        starts = np.concatenate(([0], np.cumsum(sizes[:-1])))
+        minima = np.minimum.reduceat(grouped, starts)
+        reached = np.flatnonzero(grouped == np.repeat(minima, sizes))
+        groups = np.searchsorted(starts, reached, side="right") - 1
+        first = reached[np.concatenate(([True], groups[1:] != groups[:-1]))]
+        key_min[keys] = minima
+        key_arg[keys] = np.where(np.isfinite(minima), rows[first], -1)
+        return key_min, key_arg
+
+    def source_key_min(self, key_min, key_arg, source_keys=None):
+        """
+        For each source key (only `source_keys` when given), cheapest compatible target key
+        given the result of `key_min`. Returns the minima and the target rows reaching them.
+        """
+        matrix = self.key_matrix if source_keys is None else self.key_matrix[source_keys]
+        if matrix.shape[1] == 0:
+            return np.full(len(matrix), np.inf), np.full(len(matrix), -1, dtype=np.intp)
+        masked = np.where(matrix, key_min, np.inf)
+        best_key = masked.argmin(axis=1)
+        source_min = masked[np.arange(len(masked)), best_key]
+        source_arg = np.where(np.isfinite(source_min), key_arg[best_key], -1)
+        return source_min, source_arg
+
+    def _grouped(self):
+        """Target rows sorted by key (in row order within a key) and the bounds of each key."""
+        if self._target_bounds is None:
+            self._target_order = np.argsort(self.target_codes, kind="stable")
+            self._target_bounds = np.searchsorted(
+                self.target_codes[self._target_order], np.arange(self.key_matrix.shape[1] + 1)
+            )
+        return self._target_order, self._target_bounds
+
+    def target_rows(self, keys):
+        """Returns the positions of the target rows whose key is in `keys`, key by key, in row order."""
+        order, bounds = self._grouped()
+        return np.concatenate(
+            [order[bounds[key]:bounds[key + 1]] for key in keys] or [np.empty(0, dtype=np.intp)]
+        )
+
+    def reduce_sum(self, values):
+        """For each source row, sum of `values` (one per target row) over the compatible target rows."""
+        key_sum = np.zeros(self.key_matrix.shape[1], dtype=values.dtype)
+        np.add.at(key_sum, self.target_codes, values)
+        matrix = self.key_matrix if values.dtype != object else self.key_matrix.astype(object)
+        return (matrix @ key_sum)[self.source_codes]
+
+
+class Catalog:
+    """
+    Indexed, read-optimised view of the component catalog.
+
+    Built once from the records of each component, it gives O(1) id -> row access,
+    pre-parsed list columns, contiguous numeric columns, categorical codes of the
+    attributes used by the constraints and one compatibility relation per edge.
+    """
+
+    def __init__(self, records, columns=None):
+        """
+        Arguments:
+        records -- a dictionary mapping each component to its list of rows (dictionaries).
+        columns -- optional dictionary mapping each component to its ordered column names.
+        """
+        self.records = {component: list(records[component]) for component in COMPONENTS}
+        self._compiled = {}
+        if columns is None:
+            columns = {component: list(rows[0]) if rows else [] for component, rows in self.records.items()}
+        self.columns = {component: list(columns[component]) for component in COMPONENTS}
+        self._build()
+
+    def _build(self):
+        self.ids = {}
+        self.position = {}
+        self.rows = {}
+        self.attributes = {}
+        self.arrays = {}
+        for component in COMPONENTS:
+            self._build_component(component)
+        self._relations = {}
+        self._build_relations()
+
+    def _index_rows(self, component):
+        records = self.records[component]
+        self.position[component] = {row["id"]: pos for pos, row in enumerate(records)}
+        self.rows[component] = {row["id"]: row for row in records}
+
+    def _build_component(self, component):
+        records = self.records[component]
+        self.ids[component] = np.array([row["id"] for row in records], dtype=np.int64)
+        self._index_rows(component)
+
+        # Pre-parse list columns once instead of eval'ing them at every check
+        attributes = {}
+        for column in self.columns[component]:
+            values = [row.get(column) for row in records]
+            attributes[column] = [parse_list(v) for v in values] if column in LIST_COLUMNS else values
+        self.attributes[component] = attributes
+
+        # Contiguous numeric columns used by the solvers
+        arrays = {"price": np.array([row["price"] for row in records], dtype=np.float64)}
+        for column in ("wattage", "power_draw"):
+            if column in attributes:
+                arrays[column] = np.array(attributes[column], dtype=np.float64)
+        self.arrays[component] = arrays
+
+    def _build_relations(self):
+        self.codes = {}
+        self.keys = {}
+        self.predicate_calls = {}
+        for (source, target), (source_attr, target_attr, predicate) in CONSTRAINTS.items():
+            source_keys, source_codes = self._codes(source, source_attr)
+            target_keys, target_codes = self._codes(target, target_attr)
+            self.predicate_calls[source, target] = len(source_keys) * len(target_keys)
+            key_matrix = np.array(
+                [[bool(predicate(sk, tk)) for tk in target_keys] for sk in source_keys], dtype=bool
+            ).reshape(len(source_keys), len(target_keys))
+            self._set_relation(source, target, key_matrix)
+
+    def _set_relation(self, source, target, key_matrix):
+        source_attr, target_attr, _ = CONSTRAINTS[source, target]
+        relation = Relation(source, target, self.codes[source, source_attr], self.codes[target, target_attr], key_matrix)
+        self._relations[source, target] = relation
+        self._relations[target, source] = relation.reversed()
+
+    def to_arrays(self):
+        """
+        Serialises the catalog as a flat dictionary of NumPy arrays: raw columns, categorical
+        codes and keys of the constraint attributes (list columns as bitmasks over the size
+        vocabulary) and the key-level compatibility matrices, with the number of predicate
+        calls that built them.
+        """
+        vocabulary = sorted({
+            member for component in COMPONENTS for column in LIST_COLUMNS
+            for value in self.attributes[component].get(column, []) for member in value
+        })
+        if len(vocabulary) > 63:
+            raise ValueError("Too many distinct sizes to encode as bitmasks.")
+        bits = {member: 1 << i for i, member in enumerate(vocabulary)}
+
+        def bitmasks(values):
+            return np.array([sum(bits[member] for member in value) for value in values], dtype=np.int64)
+
+        arrays = {"sizes": np.array(vocabulary, dtype=str)}
+        for component in COMPONENTS:
+            arrays[f"{component}/columns"] = np.array(self.columns[component], dtype=str)
+            arrays[f"{component}/ids"] = self.ids[component]
+            for column in self.columns[component]:
+                _pack(arrays, f"{component}/column/{column}", [row.get(column) for row in self.records[component]])
+                if column in LIST_COLUMNS:
+                    arrays[f"{component}/bitmask/{column}"] = bitmasks(self.attributes[component][column])
+        for (component, attribute), codes in self.codes.items():
+            arrays[f"{component}/codes/{attribute}"] = codes
+            keys = self.keys[component, attribute]
+            if attribute in LIST_COLUMNS:
+                arrays[f"{component}/keys/{attribute}"] = bitmasks(keys)
+            else:
+                _pack(arrays, f"{component}/keys/{attribute}", keys)
+        for source, target in CONSTRAINTS:
+            arrays[f"{source}/{target}/key_matrix"] = self._relations[source, target].key_matrix
+            arrays[f"{source}/{target}/predicate_calls"] = np.int64(self.predicate_calls.get((source, target), 0))
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        """
+        Rebuilds a catalog serialised by `to_arrays` without re-parsing or re-encoding anything.
+
+        Only the ids, numeric columns, codes and compatibility matrices the solvers work on
+        are read up front. The row views (records, rows, positions and attributes) are
+        built per component on first access, from the compiled columns kept in memory.
+        """
+        catalog = cls.__new__(cls)
+        vocabulary = arrays["sizes"].tolist()
+        decoded = {}
+
+        def sets(masks):
+            values = []
+            for mask in masks.tolist():
+                if mask not in decoded:
+                    decoded[mask] = frozenset(m for i, m in enumerate(vocabulary) if mask >> i & 1)
+                values.append(decoded[mask])
+            return values
+
+        catalog.columns, catalog.ids, catalog.arrays, catalog._compiled = {}, {}, {}, {}
+        for component in COMPONENTS:
+            catalog.columns[component] = arrays[f"{component}/columns"].tolist()
+            catalog.ids[component] = arrays[f"{component}/ids"]
+            catalog._compiled[component] = {
+                name: arrays[name] for name in arrays
+                if name.startswith((f"{component}/column/", f"{component}/bitmask/"))
+            }
+            catalog.arrays[component] = {"price": np.array(arrays[f"{component}/column/price"], dtype=np.float64)}
+            for column in ("wattage", "power_draw"):
+                if column in catalog.columns[component]:
+                    catalog.arrays[component][column] = np.array(arrays[f"{component}/column/{column}"], dtype=np.float64)
+
+        def attributes(component):
+            compiled = catalog._compiled[component]
+            return {
+                column: sets(compiled[f"{component}/bitmask/{column}"]) if column in LIST_COLUMNS
+                else _unpack(compiled, f"{component}/column/{column}")
+                for column in catalog.columns[component]
+            }
+
+        def records(component):
+            compiled, columns = catalog._compiled[component], catalog.columns[component]
+            values = [_unpack(compiled, f"{component}/column/{column}") for column in columns]
+            return [dict(zip(columns, row)) for row in zip(*values)] if columns else []
+
+        catalog.attributes = _Views(attributes)
+        catalog.records = _Views(records)
+        catalog.rows = _Views(lambda component: {row["id"]: row for row in catalog.records[component]})
+        catalog.position = _Views(lambda component: dict(zip(catalog.ids[component].tolist(), range(len(catalog.ids[component])))))
+
+        catalog.codes, catalog.keys, catalog._relations = {}, {}, {}
+        # Compatibility matrices are loaded, no predicate runs: the calls are those of the compilation
+        catalog.predicate_calls = {}
+        for (source, target), (source_attr, target_attr, _) in CONSTRAINTS.items():
+            for component, attribute in ((source, source_attr), (target, target_attr)):
+                catalog.codes[component, attribute] = arrays[f"{component}/codes/{attribute}"]
+                catalog.keys[component, attribute] = (
+                    sets(arrays[f"{component}/keys/{attribute}"]) if attribute in LIST_COLUMNS
+                    else _unpack(arrays, f"{component}/keys/{attribute}")
+                )
+            catalog._set_relation(source, target, arrays[f"{source}/{target}/key_matrix"])
+            catalog.predicate_calls[source, target] = int(arrays[f"{source}/{target}/predicate_calls"])
+        return catalog
+
+    def _materialize(self, component):
+        """
+        Builds every row view of a component (see `from_arrays`) before it is modified in
+        place: from then on they hold its data and the compiled columns are dropped.
+        """
+        self.records[component], self.rows[component], self.position[component], self.attributes[component]
+        self._compiled.pop(component, None)
+
+    def _codes(self, component, attribute):
+        if (component, attribute) not in self.codes:
+            keys, codes = _encode(self.attributes[component][attribute])
+            self.keys[component, attribute] = keys
+            self.codes[component, attribute] = codes
+        return self.keys[component, attribute], self.codes[component, attribute]
+
+    def _edges(self, component):
+        """Constraint edges involving a component."""
+        return [(s, t) for (s, t) in CONSTRAINTS if component in (s, t)]
+
+    def _add_key(self, component, attribute, value):
+        """
+        Appends a new key to the codes of an attribute and extends the key-level
+        compatibility matrices of the edges using it (the predicate only runs on the new key).
+        """
+        keys = self.keys[component, attribute]
+        keys.append(value)
+        for source, target in self._edges(component):
+            source_attr, target_attr, predicate = CONSTRAINTS[source, target]
+            key_matrix = self._relations[source, target].key_matrix
+            if (source, source_attr) == (component, attribute):
+                row = [bool(predicate(value, tk)) for tk in self.keys[target, target_attr]]
+                key_matrix = np.vstack([key_matrix, np.array(row, dtype=bool).reshape(1, -1)])
+                self._relations[source, target].key_matrix = key_matrix
+                self.predicate_calls[source, target] = self.predicate_calls.get((source, target), 0) + len(row)
+            if (target, target_attr) == (component, attribute):
+                column = [bool(predicate(sk, value)) for sk in self.keys[source, source_attr]]
+                key_matrix = np.hstack([key_matrix, np.array(column, dtype=bool).reshape(-1, 1)])
+                self._relations[source, target].key_matrix = key_matrix
+                self.predicate_calls[source, target] = self.predicate_calls.get((source, target), 0) + len(column)
+        return len(keys) - 1
+
+    def _reset_relations(self, component):
+        """Rebuilds the relation objects of the edges of a component after its codes changed."""
+        for source, target in self._edges(component):
+            self._set_relation(source, target, self._relations[source, target].key_matrix)
+
+    def update_price(self, component, component_id, price):
+        """
+        Changes the price of one component in place.
+        Returns its position in the catalog rows.
+        """
+        pos = self.position[component][component_id]
+        self.arrays[component]["price"][pos] = price
+        # Row views not built yet read the price from the compiled column (see `from_arrays`)
+        if component in self.records:
+            self.records[component][pos]["price"] = price
+        if component in self.attributes:
+            self.attributes[component]["price"][pos] = price
+        compiled = self._compiled.get(component)
+        if compiled is not None:
+            name = f"{component}/column/price"
+            if compiled[name].dtype.kind != "f" and price != int(price):
+                compiled[name] = compiled[name].astype(np.float64)
+            compiled[name][pos] = price
+        return pos
+
+    def add_row(self, component, row):
+        """
+        Appends one component (a dictionary with at least the columns used by the constraints).
+        Codes and compatibility matrices are extended instead of rebuilt: only the
+        keys the catalog has never seen are compared by the predicates.
+        Returns the position of the new row (the last one).
+        """
+        if row["id"] in self.position[component]:
+            raise ValueError(f"{component} id {row['id']} already exists")
+        self._materialize(component)
+        row = {column: row.get(column, float("nan")) for column in self.columns[component]}
+        self.records[component].append(row)
+        self.rows[component][row["id"]] = row
+        pos = self.position[component][row["id"]] = len(self.records[component]) - 1
+        self.ids[component] = np.append(self.ids[component], np.int64(row["id"]))
+        attributes = self.attributes[component]
+        for column in self.columns[component]:
+            attributes[column].append(parse_list(row[column]) if column in LIST_COLUMNS else row[column])
+        for column, values in self.arrays[component].items():
+            self.arrays[component][column] = np.append(values, np.float64(row[column]))
+
+        for (owner, attribute), codes in list(self.codes.items()):
+            if owner != component:
+                continue
+            value = attributes[attribute][pos]
+            keys = self.keys[component, attribute]
+            code = keys.index(value) if value in keys else self._add_key(component, attribute, value)
+            self.codes[component, attribute] = np.append(codes, code)
+        self._reset_relations(component)
+        return pos
+
+    def remove_row(self, component, component_id):
+        """
+        Removes one component. Keys left without rows are kept (they simply match nothing).
+        Returns the position the row had.
+        """
+        pos = self.position[component][component_id]
+        self._materialize(component)
+        del self.records[component][pos]
+        self._index_rows(component)
+        self.ids[component] = np.delete(self.ids[component], pos)
+        for values in self.attributes[component].values():
+            del values[pos]
+        for column, values in self.arrays[component].items():
+            self.arrays[component][column] = np.delete(values, pos)
+        for owner, attribute in list(self.codes):
+            if owner == component:
+                self.codes[component, attribute] = np.delete(self.codes[component, attribute], pos)
+        self._reset_relations(component)
+        return pos
+
+    def __len__(self):
+        return sum(len(self.ids[component]) for component in COMPONENTS)
+
+    def row(self, component, component_id):
+        """Returns the row (dictionary) of a component."""
+        return self.rows[component][component_id]
+
+    def value(self, component, component_id, attribute):
+        """Returns one (parsed) attribute of a component."""
+        return self.attributes[component][attribute][self.position[component][component_id]]
+
+    def price(self, component, component_id):
+        if component not in self.records:
+            # Same value as the row, read from the compiled column without building the row views
+            return self._compiled[component][f"{component}/column/price"][self.position[component][component_id]].item()
+        return self.rows[component][component_id]["price"]
+
+    def cost(self, selection):
+        """Returns the total price of a (possibly partial) configuration."""
+        return sum(self.price(component, component_id) for component, component_id in selection.items())
+
+    def relation(self, source, target):
+        """Returns the compatibility relation of an edge, oriented from `source` to `target`."""
+        return self._relations[source, target]
+
+    def compatible(self, source, source_id, target, target_id):
+        """Returns True if two components satisfy the constraint of their edge."""
+        return self._relations[source, target].compatible(
+            self.position[source][source_id], self.position[target][target_id]
+        )
+
+    def mask(self, component, component_ids=None):
+        """Returns the boolean row mask of a set of ids (all rows when `component_ids` is None)."""
+        if component_ids is None:
+            return np.ones(len(self.ids[component]), dtype=bool)
+        if isinstance(component_ids, np.ndarray) and component_ids.dtype == bool:
+            return component_ids
+        mask = np.zeros(len(self.ids[component]), dtype=bool)
+        position = self.position[component]
+        mask[[position[component_id] for component_id in component_ids if component_id in position]] = True
+        return mask
+
@@ -0,0 +1,124 @@
+import csv
+import os
+import zipfile
+
+import numpy as np
+
+from catalog import COMPONENTS, Catalog
+
+# CSV file of each component in the data directory
+FILES = {
+    "CPU": "cpus.csv",
+    "Motherboard": "motherboards.csv",
+    "RAM": "ram.csv",
+    "GPU": "gpus.csv",
+    "PSU": "psus.csv",
+    "Case": "cases.csv"
+}
+
+# Compiled catalog, written next to the CSV files
+CACHE_FILE = "catalog.npz"
+
+# Bumped whenever the layout of the compiled file changes
+CACHE_VERSION = 2
+
+
+def fingerprint(data_dir="data"):
+    """
+    Identifies the current content of the CSV files by their size and modification time.
+    """
+    entries = [f"v{CACHE_VERSION}"]
+    for component in COMPONENTS:
+        stat = os.stat(os.path.join(data_dir, FILES[component]))
+        entries.append(f"{FILES[component]}:{stat.st_size}:{stat.st_mtime_ns}")
+    return np.array(entries, dtype=str)
+
+
+def _parse_column(cells):
+    """
+    Types one CSV column like pandas would: integers, floats when some cells are decimal
+    or empty, text otherwise. Empty cells give NaN.
+    """
+    filled = [cell for cell in cells if cell != ""]
+    for kind in (int, float):
+        try:
+            values = [kind(cell) for cell in filled]
+        except ValueError:
+            continue
+        if kind is int and len(filled) < len(cells):
+            continue
+        values = iter(values)
+        return [next(values) if cell != "" else float("nan") for cell in cells]
+    return [cell if cell != "" else float("nan") for cell in cells]
+
+
+def read_csv_files(data_dir="data"):
+    """
+    Parses the CSV files of all components with the csv module (no pandas needed).
+    Returns the rows (dictionaries) and the ordered column names of each component.
+    """
+    records, columns = {}, {}
+    for component in COMPONENTS:
+        with open(os.path.join(data_dir, FILES[component]), newline="", encoding="utf-8") as f:
+            reader = csv.reader(f)
+            header = next(reader, [])
+            cells = list(zip(*reader)) or [() for _ in header]
+        values = [_parse_column(list(column)) for column in cells]
+        records[component] = [dict(zip(header, row)) for row in zip(*values)]
+        columns[component] = header
+    return records, columns
+
+
+def compile_catalog(data_dir="data", cache_path=None):
+    """
+    Compiles `data_dir/*.csv` into a single binary file: raw columns, categorical codes of
+    the constraint attributes, size bitmasks and key-level compatibility matrices.
+    Returns the compiled catalog.
+    """
+    cache_path = cache_path or os.path.join(data_dir, CACHE_FILE)
+    stamp = fingerprint(data_dir)
+    catalog = Catalog(*read_csv_files(data_dir))
+    arrays = catalog.to_arrays()
+    arrays["fingerprint"] = stamp
+
+    # Write then rename, so concurrent workers never read a partial file
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez(f, **arrays)
+    os.replace(tmp_path, cache_path)
+    return catalog
+
+
+def _read(cache_path):
+    with np.load(cache_path) as arrays:
+        return dict(arrays)
+
+
+def load_compiled(data_dir="data", cache_path=None):
+    """
+    Returns the arrays of the compiled catalog (dictionary name -> array), compiling it
+    first if it is missing, older than the CSV files or unreadable (corrupt or foreign file).
+    """
+    cache_path = cache_path or os.path.join(data_dir, CACHE_FILE)
+    if os.path.exists(cache_path):
+        try:
+            arrays = _read(cache_path)
+        except (OSError, ValueError, EOFError, zipfile.BadZipFile):
+            arrays = {}
+        if "fingerprint" in arrays and np.array_equal(arrays["fingerprint"], fingerprint(data_dir)):
+            return arrays
+    compile_catalog(data_dir, cache_path)
+    return _read(cache_path)
+
+
+def load_cached_catalog(data_dir="data", cache_path=None):
+    """
+    Loads the indexed catalog from the compiled file (compiled on demand).
+    """
+    return Catalog.from_arrays(load_compiled(data_dir, cache_path))
+
+
+# Compile the catalog
+if __name__ == "__main__":
+    catalog = compile_catalog()
+    print(f"📦 Catalogue compilé dans 'data/{CACHE_FILE}' ({len(catalog)} composants).")
@@ -0,0 +1,245 @@
+import argparse
+import asyncio
+import json
+import secrets
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from catalog import COMPONENTS
+from propagation import Propagator
+from tree_solver import TreeSolver
+from utils import load_catalog
+
+# Sessions idle for longer than this are discarded (seconds)
+SESSION_TTL = 30 * 60
+
+REASONS = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 409: "Conflict",
+           500: "Internal Server Error"}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class Session:
+    """
+    Server-side state of one configuration: propagated domains (with their undo trail)
+    and the components selected so far.
+    """
+
+    def __init__(self, catalog, budget=None, solver=None):
+        self.propagator = Propagator(catalog, budget=budget, solver=solver)
+        self.propagator.propagate()
+        self.selection = {}
+        self.lock = asyncio.Lock()
+        self.last_access = time.monotonic()
+
+
+class ConfiguratorService:
+    """
+    Long-lived configurator: the catalog, its compatibility relations and the minimum-cost
+    tables are loaded once, and every session keeps its propagated domains, so a selection
+    costs one incremental propagation. CPU-bound work runs in an executor so that sessions
+    do not block each other.
+    """
+
+    def __init__(self, catalog, executor=None):
+        self.catalog = catalog
+        # Built once: the budget bounds of every session start from copies of its tables
+        self.solver = TreeSolver(catalog)
+        self.solver.completions
+        self.min_cost = self.solver.min_cost()
+        self.sessions = {}
+        self.executor = executor or ThreadPoolExecutor()
+
+    async def _run(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, function, *args)
+
+    def _session(self, session_id):
+        session = self.sessions.get(session_id)
+        if session is None:
+            raise HTTPError(404, f"unknown session {session_id}")
+        session.last_access = time.monotonic()
+        return session
+
+    def purge(self):
+        """Discards the sessions idle for longer than SESSION_TTL."""
+        now = time.monotonic()
+        for session_id in [sid for sid, s in self.sessions.items() if now - s.last_access > SESSION_TTL]:
+            del self.sessions[session_id]
+
+    def _state(self, session_id, session):
+        """
+        Options still available per component (with their cheapest completion when a budget is set).
+        Runs in the executor: it goes over every remaining option.
+        """
+        propagator = session.propagator
+        options = {}
+        for component in COMPONENTS:
+            if component in session.selection:
+                continue
+            options[component] = []
+            for component_id in propagator.ids(component):
+                row = self.catalog.row(component, component_id)
+                option = {"id": component_id, "name": row["name"], "price": row["price"]}
+                if propagator.budget is not None:
+                    option["cheapest_completion"] = propagator.cheapest_completion(component, component_id)
+                options[component].append(option)
+        return {"session": session_id, "selection": dict(session.selection), "budget": propagator.budget,
+                "options": options}
+
+    async def start(self, body):
+        budget = body.get("budget")
+        if budget is not None and (not isinstance(budget, (int, float)) or self.min_cost is None or budget < self.min_cost):
+            raise HTTPError(400, f"budget must be a number of at least {self.min_cost}")
+        session = await self._run(Session, self.catalog, budget, self.solver)
+        session_id = secrets.token_hex(8)
+        self.sessions[session_id] = session
+        async with session.lock:
+            return 201, await self._run(self._state, session_id, session)
+
+    async def options(self, session_id, body):
+        session = self._session(session_id)
+        async with session.lock:
+            return 200, await self._run(self._state, session_id, session)
+
+    async def select(self, session_id, body):
+        session = self._session(session_id)
+        component, component_id = body.get("component"), body.get("id")
+        if not isinstance(component_id, int) or isinstance(component_id, bool):
+            raise HTTPError(400, f"id must be an integer, not {component_id!r}")
+        async with session.lock:
+            # Checked under the lock, so that concurrent selections of one component cannot both pass
+            if not isinstance(component, str) or component not in COMPONENTS or component in session.selection:
+                raise HTTPError(400, f"invalid component {component!r}")
+            if (component, component_id) not in session.propagator:
+                raise HTTPError(409, f"{component} {component_id} is not available")
+            if not await self._run(session.propagator.assign, component, component_id):
+                await self._run(session.propagator.undo)
+                raise HTTPError(409, f"no compatible configuration with {component} {component_id}")
+            session.selection[component] = component_id
+            return 200, await self._run(self._state, session_id, session)
+
+    async def undo(self, session_id, body):
+        session = self._session(session_id)
+        async with session.lock:
+            if not session.selection:
+                raise HTTPError(409, "nothing to undo")
+            await self._run(session.propagator.undo)
+            session.selection.popitem()
+            return 200, await self._run(self._state, session_id, session)
+
+    async def finalize(self, session_id, body):
+        session = self._session(session_id)
+        async with session.lock:
+            missing = [component for component in COMPONENTS if component not in session.selection]
+            if missing:
+                raise HTTPError(409, f"missing components: {', '.join(missing)}")
+            configuration = {component: session.selection[component] for component in COMPONENTS}
+            rows = {
+                component: {k: v for k, v in self.catalog.row(component, component_id).items() if v == v}
+                for component, component_id in configuration.items()
+            }
+            return 200, {"session": session_id, "configuration": configuration, "rows": rows,
+                         "cost": self.catalog.cost(configuration)}
+
+    async def close(self, session_id, body):
+        self._session(session_id)
+        del self.sessions[session_id]
+        return 200, {"session": session_id, "closed": True}
+
+    async def dispatch(self, method, path, body):
+        parts = [part for part in path.split("?")[0].split("/") if part]
+        if parts == ["sessions"] and method == "POST":
+            return await self.start(body)
+        if len(parts) >= 2 and parts[0] == "sessions":
+            routes = {
+                ("GET", None): self.options, ("DELETE", None): self.close,
+                ("GET", "options"): self.options, ("POST", "select"): self.select,
+                ("POST", "undo"): self.undo, ("POST", "finalize"): self.finalize,
+            }
+            action = parts[2] if len(parts) == 3 else None
+            if len(parts) <= 3 and (method, action) in routes:
+                return await routes[method, action](parts[1], body)
+        raise HTTPError(404, f"no route for {method} {path}")
+
+    async def handle(self, reader, writer):
+        """Serves the HTTP/1.1 requests of one connection (keep-alive)."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                raw_body = await reader.readexactly(int(headers.get("content-length", 0)))
+
+                try:
+                    body = json.loads(raw_body) if raw_body else {}
+                    if not isinstance(body, dict):
+                        raise HTTPError(400, "body must be a JSON object")
+                    status, payload = await self.dispatch(method, path, body)
+                except json.JSONDecodeError:
+                    status, payload = 400, {"error": "invalid JSON body"}
+                except HTTPError as error:
+                    status, payload = error.status, {"error": str(error)}
+                except Exception as error:
+                    # A bug in one request must not drop the connection
+                    status, payload = 500, {"error": f"internal error: {type(error).__name__}"}
+
+                data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                keep_alive = headers.get("connection", "").lower() != "close"
+                writer.write(
+                    f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+                    f"Content-Type: application/json; charset=utf-8\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + data
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ValueError, asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _purge_periodically(self):
+        while True:
+            await asyncio.sleep(60)
+            self.purge()
+
+    async def serve(self, host="127.0.0.1", port=8000):
+        server = await asyncio.start_server(self.handle, host, port)
+        purger = asyncio.create_task(self._purge_periodically())
+        print(f"🚀 Configurateur disponible sur http://{host}:{port}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            purger.cancel()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Service HTTP/JSON du configurateur de PC.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--data-dir", default="data", help="dossier des fichiers CSV")
+    args = parser.parse_args(argv)
+
+    service = ConfiguratorService(load_catalog(args.data_dir))
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
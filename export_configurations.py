@@ -0,0 +1,140 @@
+import argparse
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+from catalog import COMPONENTS
+from tree_solver import TreeSolver
+from utils import load_catalog
+
+# Configurations written per chunk
+CHUNK_SIZE = 65536
+
+FORMATS = ("csv", "parquet")
+
+
+def export_schema(catalog):
+    """
+    Columns of the export, computed once: one column per (component, catalog column),
+    named `<component>_<column>`, then the total cost.
+    Returns the list of (name, component, column) triples, the last one (total cost)
+    with no component.
+    """
+    schema = [
+        (f"{component}_{column}", component, column)
+        for component in COMPONENTS for column in catalog.columns[component]
+    ]
+    return schema + [("total_cost", None, None)]
+
+
+def _column_arrays(catalog, schema):
+    """Catalog columns as NumPy arrays aligned with the rows, missing text cells as None."""
+    arrays = {}
+    for name, component, column in schema:
+        if component is None:
+            continue
+        values = [row.get(column) for row in catalog.records[component]]
+        if all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in values):
+            arrays[name] = np.array(values)
+        else:
+            arrays[name] = np.array([None if isinstance(v, float) and math.isnan(v) else v for v in values], dtype=object)
+    return arrays
+
+
+def chunk_frame(catalog, schema, arrays, positions):
+    """
+    Builds the DataFrame of one chunk of configurations (row positions, one column per
+    component) with one fancy-indexing gather per column.
+    """
+    columns = {}
+    total = np.zeros(len(positions))
+    for name, component, column in schema:
+        if component is None:
+            continue
+        component_positions = positions[:, COMPONENTS.index(component)]
+        columns[name] = arrays[name][component_positions]
+        if column == "price":
+            total += catalog.arrays[component]["price"][component_positions]
+    columns["total_cost"] = total
+    return pd.DataFrame(columns, columns=[name for name, _, _ in schema])
+
+
+def _parquet_writer(path, schema, arrays):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as error:
+        raise RuntimeError("L'export Parquet nécessite pyarrow (pip install pyarrow).") from error
+
+    # Types inferred once from the whole catalog columns, so that every chunk shares them
+    fields = [pa.field(name, pa.array(arrays[name]).type) for name, component, _ in schema if component is not None]
+    arrow_schema = pa.schema(fields + [pa.field("total_cost", pa.float64())])
+    writer = pq.ParquetWriter(path, arrow_schema)
+
+    def write(frame):
+        writer.write_table(pa.Table.from_pandas(frame, schema=arrow_schema, preserve_index=False))
+
+    return write, writer.close
+
+
+def export_configurations(solver, path, file_format=None, budget=None, chunk_size=CHUNK_SIZE, ordered=False):
+    """
+    Streams every valid configuration within the budget (all of them when None) to a CSV
+    or Parquet file, chunk by chunk: memory stays bounded by the chunk size whatever the
+    number of configurations.
+
+    Arguments:
+    solver -- the TreeSolver of the catalog (possibly restricted).
+    path -- output file.
+    file_format -- "csv" or "parquet" (guessed from the extension when None).
+    budget -- optional maximum total cost.
+    chunk_size -- number of configurations per chunk.
+    ordered -- write the configurations in increasing cost order (see TreeSolver.chunks).
+    Returns the number of configurations written.
+    """
+    file_format = file_format or ("parquet" if path.endswith(".parquet") else "csv")
+    if file_format not in FORMATS:
+        raise ValueError(f"unknown format {file_format!r}")
+    catalog = solver.catalog
+    schema = export_schema(catalog)
+    arrays = _column_arrays(catalog, schema)
+
+    if file_format == "parquet":
+        write, close = _parquet_writer(path, schema, arrays)
+    else:
+        f = open(path, "w", newline="", encoding="utf-8")
+        f.write(",".join(name for name, _, _ in schema) + "\n")
+        close = f.close
+
+        def write(frame):
+            frame.to_csv(f, header=False, index=False)
+
+    written = 0
+    try:
+        for positions in solver.chunks(budget, chunk_size, ordered):
+            write(chunk_frame(catalog, schema, arrays, positions))
+            written += len(positions)
+    finally:
+        close()
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Exporte toutes les configurations valides en CSV ou Parquet.")
+    parser.add_argument("output", help="fichier de sortie (.csv ou .parquet)")
+    parser.add_argument("--budget", type=float, help="coût total maximal")
+    parser.add_argument("--format", choices=FORMATS, help="format de sortie (déduit de l'extension par défaut)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="configurations par bloc")
+    parser.add_argument("--ordered", action="store_true", help="par coût croissant (mémoire proportionnelle au nombre de configurations)")
+    parser.add_argument("--data-dir", default="data", help="dossier des fichiers CSV")
+    args = parser.parse_args(argv)
+
+    solver = TreeSolver(load_catalog(args.data_dir))
+    written = export_configurations(solver, args.output, args.format, args.budget, args.chunk_size, args.ordered)
+    print(f"📂 {written} configurations exportées dans '{os.path.abspath(args.output)}'.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+import argparse
+import csv
+import os
+import random
+
+from catalog_cache import FILES
+
+MOTHERBOARD_SIZES = ["E-ATX", "ATX", "Micro-ATX", "Mini-ITX"]
+PSU_SIZES = ["ATX", "SFX", "SFX-L"]
+CAPACITIES = ["8GB", "16GB", "32GB", "64GB"]
+SPEEDS = ["2666MHz", "3200MHz", "3600MHz", "4800MHz", "5200MHz", "6000MHz", "6400MHz"]
+
+
+def generate_catalog(size, density=0.5, seed=0):
+    """
+    Generates a synthetic catalog in the schema of `data/*.csv`.
+
+    Arguments:
+    size -- number of parts per component.
+    density -- compatibility density in (0, 1]: the lower it is, the more sockets and
+               memory types there are and the fewer sizes each case supports.
+    seed -- seed of the random generator.
+    Returns a dictionary mapping each component to its list of rows.
+    """
+    if size < 1:
+        raise ValueError("size must be at least 1")
+    if not 0 < density <= 1:
+        raise ValueError("density must be in (0, 1]")
+    rng = random.Random(seed)
+    n_families = max(1, round(1 / density))
+    sockets = [f"SOCKET{i}" for i in range(n_families)]
+    ram_types = [f"DDR{4 + i}" for i in range(n_families)]
+
+    def supported(sizes):
+        chosen = [s for s in sizes if rng.random() < density]
+        return str(chosen or [rng.choice(sizes)])
+
+    data = {"CPU": [], "Motherboard": [], "RAM": [], "GPU": [], "PSU": [], "Case": []}
+    for i in range(1, size + 1):
+        cores = rng.choice([4, 6, 8, 12, 16, 24])
+        data["CPU"].append({
+            "id": i, "name": f"CPU {i}", "socket": rng.choice(sockets), "cores": cores,
+            "tdp": float(rng.choice([65, 105, 125, 170])), "price": 60 + cores * rng.randint(15, 30),
+        })
+        data["Motherboard"].append({
+            "id": i, "name": f"Motherboard {i}", "socket": rng.choice(sockets), "size": rng.choice(MOTHERBOARD_SIZES),
+            "ram_type": rng.choice(ram_types), "max_ram": rng.choice(["64GB", "128GB", "192GB"]), "price": rng.randint(80, 450),
+        })
+        data["RAM"].append({
+            "id": i, "name": f"RAM {i}", "ram_type": rng.choice(ram_types), "capacity": rng.choice(CAPACITIES),
+            "speed": rng.choice(SPEEDS), "price": rng.randint(40, 300),
+        })
+        power_draw = rng.randint(75, 450)
+        data["GPU"].append({"id": i, "name": f"GPU {i}", "power_draw": power_draw, "price": power_draw * rng.randint(2, 4)})
+        wattage = rng.choice(range(400, 1300, 50))
+        data["PSU"].append({
+            "id": i, "name": f"PSU {i}", "wattage": wattage, "size": rng.choice(PSU_SIZES), "price": wattage // 10 + rng.randint(0, 80),
+        })
+        data["Case"].append({
+            "id": i, "name": f"Case {i}", "type": rng.choice(MOTHERBOARD_SIZES),
+            "supported_motherboard_sizes": supported(MOTHERBOARD_SIZES), "supported_psu_sizes": supported(PSU_SIZES),
+            "price": rng.randint(50, 250),
+        })
+    return data
+
+
+def write_catalog(data, data_dir):
+    """Writes a catalog as the six CSV files read by `load_all_data`."""
+    os.makedirs(data_dir, exist_ok=True)
+    for component, rows in data.items():
+        with open(os.path.join(data_dir, FILES[component]), "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Génère un catalogue synthétique au format de data/*.csv.")
+    parser.add_argument("output", help="dossier de sortie")
+    parser.add_argument("--size", type=int, default=1000, help="nombre de composants par catégorie")
+    parser.add_argument("--density", type=float, default=0.5, help="densité de compatibilité, dans ]0, 1]")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    write_catalog(generate_catalog(args.size, args.density, args.seed), args.output)
+    print(f"📂 Catalogue de {args.size} composants par catégorie écrit dans '{args.output}'.")
+
+
+if __name__ == "__main__":
+    main()
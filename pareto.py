@@ -0,0 +1,227 @@
+import argparse
+import json
+import re
+
+import numpy as np
+
+from catalog import COMPONENTS, SAFETY_MARGIN
+from tree_solver import ROOT, tree_structure
+from utils import load_catalog
+
+
+def _number(value):
+    """Leading number of a cell ("16GB" -> 16, "3200MHz" -> 3200), 0 when there is none."""
+    if isinstance(value, (int, float)):
+        return 0.0 if value != value else float(value)
+    match = re.match(r"\s*([0-9]+(?:\.[0-9]+)?)", str(value))
+    return float(match.group(1)) if match else 0.0
+
+
+# Objectives traded against the price, all maximised. Each one is a sum of per-component
+# contributions (component, column, weight): the PSU headroom is the wattage minus the GPU
+# power draw with its safety margin.
+OBJECTIVES = {
+    "cores": [("CPU", "cores", 1.0)],
+    "capacity": [("RAM", "capacity", 1.0)],
+    "speed": [("RAM", "speed", 1.0)],
+    "headroom": [("PSU", "wattage", 1.0), ("GPU", "power_draw", -SAFETY_MARGIN)],
+}
+
+
+def _pareto(points):
+    """
+    Indices of the non-dominated rows of `points` (every column minimised), one per
+    distinct vector. After a lexicographic sort a point can only be dominated by an
+    earlier one, so each point is compared with the frontier kept so far.
+    """
+    if not len(points):
+        return np.empty(0, dtype=np.intp)
+    points, index = np.unique(points, axis=0, return_index=True)
+    if points.shape[1] == 1:
+        return index[:1]
+    kept = np.empty_like(points)
+    n_kept = 0
+    keep = []
+    for i in range(len(points)):
+        if n_kept and (kept[:n_kept] <= points[i]).all(axis=1).any():
+            continue
+        kept[n_kept] = points[i]
+        n_kept += 1
+        keep.append(i)
+    return index[keep]
+
+
+class Front:
+    """A set of non-dominated partial configurations: objective vectors plus, for each, the rows used."""
+
+    def __init__(self, points, payloads):
+        self.points = points
+        self.payloads = payloads
+
+    def __len__(self):
+        return len(self.points)
+
+    @classmethod
+    def build(cls, points, payloads, budget=None):
+        """Keeps the non-dominated points (and those within the budget, the price being column 0)."""
+        if budget is not None:
+            within = np.flatnonzero(points[:, 0] <= budget + 1e-9)
+            points, payloads = points[within], [payloads[i] for i in within.tolist()]
+        keep = _pareto(points)
+        return cls(points[keep], [payloads[i] for i in keep.tolist()])
+
+    @classmethod
+    def union(cls, fronts, budget=None):
+        fronts = [front for front in fronts if len(front)]
+        if not fronts:
+            return None
+        if len(fronts) == 1:
+            return fronts[0]
+        points = np.concatenate([front.points for front in fronts])
+        return cls.build(points, [payload for front in fronts for payload in front.payloads], budget)
+
+    def combine(self, other, budget=None):
+        """Pareto frontier of the sums of one point of each front (Minkowski sum)."""
+        points = (self.points[:, None, :] + other.points[None, :, :]).reshape(-1, self.points.shape[1])
+        if budget is not None:
+            within = np.flatnonzero(points[:, 0] <= budget + 1e-9)
+        else:
+            within = np.arange(len(points))
+        keep = within[_pareto(points[within])]
+        n_other = len(other)
+        payloads = [self.payloads[i // n_other] + other.payloads[i % n_other] for i in keep.tolist()]
+        return Front(points[keep], payloads)
+
+
+class ParetoSolver:
+    """
+    Pareto frontier of the valid configurations over the price and performance objectives,
+    by dynamic programming over the constraint tree.
+
+    Every objective is a sum of per-component contributions, so the frontier of a subtree
+    is built from the frontiers of its children: for each edge, the child frontiers are
+    merged per key of the parent (socket, size...) and pruned; then the rows of a component
+    sharing the same keys are pruned on their own contributions before being combined
+    with the frontiers of their children (Minkowski sum, pruned again). Configurations are
+    never enumerated, and the price bound prunes every partial frontier with a budget.
+    """
+
+    def __init__(self, catalog, objectives=tuple(OBJECTIVES), domains=None, budget=None, root=ROOT):
+        """
+        Arguments:
+        catalog -- the indexed Catalog.
+        objectives -- names of the objectives traded against the price (see OBJECTIVES).
+        domains -- optional dictionary restricting the ids allowed for some components.
+        budget -- optional maximum total cost.
+        root -- the component the tree is rooted at.
+        """
+        for objective in objectives:
+            if objective not in OBJECTIVES:
+                raise ValueError(f"unknown objective {objective!r}")
+        self.catalog = catalog
+        self.objectives = list(objectives)
+        self.budget = budget
+        self.root = root
+        self.parent, self.children, self.order = tree_structure(root)
+        domains = domains or {}
+        self.domains = {component: catalog.mask(component, domains.get(component)) for component in COMPONENTS}
+        self.vectors = {component: self._vectors(component) for component in COMPONENTS}
+
+    def _vectors(self, component):
+        """Contribution of every row to the minimised objectives: price, then the opposite of each objective."""
+        attributes = self.catalog.attributes[component]
+        vectors = np.zeros((len(self.catalog.records[component]), 1 + len(self.objectives)))
+        vectors[:, 0] = self.catalog.arrays[component]["price"]
+        for j, objective in enumerate(self.objectives, start=1):
+            for owner, column, weight in OBJECTIVES[objective]:
+                if owner == component:
+                    vectors[:, j] -= weight * np.array([_number(v) for v in attributes[column]])
+        return vectors
+
+    def _solve(self, component):
+        """
+        Frontiers of the subtree of `component`, one per key of the edge to its parent
+        (a single one, under the key None, at the root).
+        """
+        # Frontier of each child subtree for every key of this component on their edge
+        child_fronts = {}
+        for child in self.children[component]:
+            fronts = self._solve(child)
+            key_matrix = self.catalog.relation(component, child).key_matrix
+            child_fronts[child] = {
+                key: Front.union([fronts[k] for k in np.flatnonzero(key_matrix[key]).tolist() if k in fronts], self.budget)
+                for key in range(key_matrix.shape[0])
+            }
+
+        # Rows grouped by their keys: the one towards the parent, then one per child
+        rows = np.flatnonzero(self.domains[component])
+        codes = []
+        if self.parent[component] is not None:
+            codes.append(self.catalog.relation(self.parent[component], component).target_codes[rows])
+        for child in self.children[component]:
+            codes.append(self.catalog.relation(component, child).source_codes[rows])
+        groups = np.stack(codes, axis=1) if codes else np.zeros((len(rows), 0), dtype=np.intp)
+        group_keys, group_of = np.unique(groups, axis=0, return_inverse=True)
+        group_of = group_of.reshape(-1)
+
+        by_parent_key = {}
+        offset = 1 if self.parent[component] is not None else 0
+        for g, keys in enumerate(group_keys.tolist()):
+            group_rows = rows[group_of == g]
+            front = Front.build(
+                self.vectors[component][group_rows], [((component, pos),) for pos in group_rows.tolist()], self.budget
+            )
+            for child, key in zip(self.children[component], keys[offset:]):
+                other = child_fronts[child][key]
+                if other is None or not len(front):
+                    front = None
+                    break
+                front = front.combine(other, self.budget)
+            if front is not None and len(front):
+                by_parent_key.setdefault(keys[0] if offset else None, []).append(front)
+        return {key: Front.union(fronts, self.budget) for key, fronts in by_parent_key.items()}
+
+    def frontier(self):
+        """
+        Returns the Pareto-optimal configurations, by increasing cost, as dictionaries with
+        the "configuration" (component -> id), its "cost" and the value of each objective.
+        """
+        front = self._solve(self.root).get(None)
+        if front is None:
+            return []
+        results = []
+        for point, payload in zip(front.points.tolist(), front.payloads):
+            configuration = {component: None for component in COMPONENTS}
+            for component, pos in payload:
+                configuration[component] = int(self.catalog.ids[component][pos])
+            result = {"configuration": configuration, "cost": self.catalog.cost(configuration)}
+            for objective, value in zip(self.objectives, point[1:]):
+                result[objective] = -value + 0.0
+            results.append(result)
+        return sorted(results, key=lambda result: result["cost"])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Frontière de Pareto prix / performances des configurations valides.")
+    parser.add_argument("--objectives", nargs="+", default=list(OBJECTIVES), choices=list(OBJECTIVES),
+                        help="critères maximisés face au prix")
+    parser.add_argument("--budget", type=float, help="coût total maximal")
+    parser.add_argument("--json", action="store_true", help="une ligne JSON par configuration")
+    parser.add_argument("--data-dir", default="data", help="dossier des fichiers CSV")
+    args = parser.parse_args(argv)
+
+    catalog = load_catalog(args.data_dir)
+    frontier = ParetoSolver(catalog, args.objectives, budget=args.budget).frontier()
+    if args.json:
+        for result in frontier:
+            print(json.dumps(result, ensure_ascii=False))
+        return
+    print(f"\n📈 {len(frontier)} configurations Pareto-optimales (prix vs {', '.join(args.objectives)}) :")
+    for result in frontier:
+        names = ", ".join(catalog.row(component, component_id)["name"] for component, component_id in result["configuration"].items())
+        values = ", ".join(f"{objective}={result[objective]:g}" for objective in args.objectives)
+        print(f"💰 {result['cost']}€ | {values} | {names}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+
+import numpy as np
+
+from batch_solver import loaded_catalog, process_pool
+from catalog import COMPONENTS
+from tree_solver import TreeSolver
+
+# Outputs a partitioned query can ask for
+OUTPUTS = ("count", "cheapest", "top_k")
+
+# Below this many configurations the top-k search runs in the parent: the search is then
+# shorter than building the configurations, which stays serial, and than starting the pool
+# (about 0.25 s of search for 0.5 s of output at k = 100000 with 100k parts per component)
+MIN_PARALLEL_K = 100000
+
+# Configurations a partition produces between two looks at the shared cost bound
+BLOCK_SIZE = 1024
+
+# Solver rooted at the separator and progress of the top-k shared by the partitions
+# (solutions produced, highest cost produced, cost bound), set in the parent before the
+# pool starts so that forked workers inherit them.
+_solver = None
+_progress = None
+
+
+def partitions(catalog, separator, attribute=None, n_parts=None, costs=None):
+    """
+    Splits the values of the separator component into disjoint groups of ids. Fixing the
+    separator to one group gives an independent sub-problem: every configuration belongs
+    to exactly one of them.
+
+    Arguments:
+    separator -- the component the problem is split on (e.g. "Case" or "Motherboard").
+    attribute -- optional attribute of the separator: one group per value (e.g. "socket").
+    n_parts -- without attribute, number of groups (one per id by default).
+    costs -- optional cost of every value of the separator: without attribute, values are
+             dealt to the groups in increasing cost order, so each group gets cheap and
+             expensive values alike.
+    """
+    if separator not in COMPONENTS:
+        raise ValueError(f"unknown component {separator!r}")
+    ids = catalog.ids[separator]
+    if attribute is not None:
+        if attribute not in catalog.attributes[separator]:
+            raise ValueError(f"unknown {separator} attribute {attribute!r}")
+        groups = {}
+        for component_id, value in zip(ids.tolist(), catalog.attributes[separator][attribute]):
+            groups.setdefault(value, []).append(component_id)
+        return list(groups.values())
+    n_parts = len(ids) if n_parts is None else max(1, min(n_parts, len(ids)))
+    order = np.arange(len(ids)) if costs is None else np.argsort(costs, kind="stable")
+    return [np.sort(ids[order[part::n_parts]]).tolist() for part in range(n_parts)]
+
+
+def _init_partition(separator, progress):
+    global _solver, _progress
+    if _solver is None or _solver.root != separator:
+        _solver = TreeSolver(loaded_catalog(), root=separator)
+    _progress = progress
+
+
+def search_partition(solver, roots, budget=None, k=None, progress=None):
+    """
+    Best-first search of one partition: the configurations starting from the separator
+    positions `roots` (the root of `solver`; all of them when None), in increasing cost order.
+    Returns their costs and row positions (in tree order).
+
+    With `progress`, a shared array (solutions produced, highest cost produced, cost bound)
+    updated by every partition, the search stops as soon as the k cheapest configurations
+    of all partitions are known to cost at most the bound, instead of producing k of its own.
+    Once k configurations are produced, the bound is the highest of their costs: every
+    partition still produces all its configurations below it, so configurations costing
+    exactly the bound are not needed beyond those already produced.
+    """
+    prices = [solver.catalog.arrays[component]["price"] for component in solver.order]
+    search = solver._search(budget, k, roots)
+    blocks = [(np.empty(0), np.empty((0, len(solver.order)), dtype=np.intp))]
+    while True:
+        found = np.array(list(itertools.islice(search, BLOCK_SIZE)), dtype=np.intp).reshape(-1, len(solver.order))
+        if not len(found):
+            break
+        costs = sum(price[found[:, level]] for level, price in enumerate(prices))
+        if progress is not None:
+            with progress.get_lock():
+                # Costs are increasing: the configurations below the bound are a prefix of the block
+                kept = int(np.searchsorted(costs, progress[2]))
+                progress[0] += kept
+                if kept:
+                    progress[1] = max(progress[1], costs[kept - 1])
+                if progress[0] >= k:
+                    progress[2] = min(progress[2], progress[1])
+            if kept < len(found):
+                blocks.append((costs[:kept], found[:kept]))
+                break
+        blocks.append((costs, found))
+    return np.concatenate([costs for costs, _ in blocks]), np.concatenate([found for _, found in blocks])
+
+
+def _search(task):
+    return search_partition(_solver, *task, progress=_progress)
+
+
+def merge(solver, results, k=None):
+    """
+    Merges the top-k of the partitions (costs and positions, see `search_partition`) into
+    the k cheapest configurations, as in `TreeSolver.top_k`.
+    """
+    results = list(results)
+    costs = np.concatenate([costs for costs, _ in results])
+    positions = np.concatenate([positions for _, positions in results])
+    positions = positions[np.argsort(costs, kind="stable")[:k]]
+    columns, prices = [], []
+    for component in COMPONENTS:
+        # Prices are read once per distinct value (as `Catalog.cost` would read them)
+        rows, inverse = np.unique(positions[:, solver.order.index(component)], return_inverse=True)
+        ids = solver.catalog.ids[component][rows].tolist()
+        values = [solver.catalog.price(component, component_id) for component_id in ids]
+        columns.append([ids[i] for i in inverse.tolist()])
+        prices.append([values[i] for i in inverse.tolist()])
+    return [
+        {"configuration": dict(zip(COMPONENTS, ids)), "cost": sum(values)}
+        for ids, values in zip(zip(*columns), zip(*prices))
+    ]
+
+
+def solve_partitioned(separator="Case", attribute=None, budget=None, k=None, outputs=OUTPUTS,
+                      workers=None, n_parts=None, data_dir="data"):
+    """
+    Solves the problem split on a separator component.
+
+    The tree is rooted at the separator: the tables of the subtrees below it, which do not
+    depend on the partition, are computed once in the parent, and the count and cheapest
+    configuration follow from them directly. The top-k search, the only part whose cost grows
+    with the number of configurations, is split between a pool of processes, each searching
+    the configurations of one group of separator values; the partitions share a cost bound,
+    so together they produce about k configurations rather than k each. Smaller searches
+    (k below MIN_PARALLEL_K) run in the parent.
+
+    Arguments:
+    separator, attribute -- how the problem is partitioned (see `partitions`).
+    budget -- optional maximum total cost (cheapest and top-k).
+    k -- number of configurations of the top-k (all of them within the budget when None).
+    outputs -- results wanted among "count", "cheapest" and "top_k".
+    workers -- number of processes (all cores by default).
+    n_parts -- without attribute, number of partitions (one per process by default).
+    """
+    global _solver, _progress
+    for output in outputs:
+        if output not in OUTPUTS:
+            raise ValueError(f"unknown output {output!r}")
+    catalog = loaded_catalog(data_dir)
+    _solver = solver = TreeSolver(catalog, root=separator)
+
+    result = {}
+    if "count" in outputs:
+        result["count"] = solver.count()
+    if "cheapest" in outputs:
+        result["cheapest"] = solver.cheapest(budget)
+    if "top_k" not in outputs:
+        return result
+
+    workers = workers or os.cpu_count()
+    if workers == 1 or (k is not None and k < MIN_PARALLEL_K):
+        results = [search_partition(solver, None, budget, k)]
+    else:
+        groups = partitions(catalog, separator, attribute, n_parts or workers, solver.subtree_cost[separator])
+        tasks = [(np.flatnonzero(catalog.mask(separator, ids)), budget, k) for ids in groups]
+        # Without k, every partition produces all its configurations within the budget: nothing to share
+        _progress = None if k is None else multiprocessing.Array("d", [0, -np.inf, np.inf])
+        with process_pool(workers, data_dir, _init_partition, (separator, _progress)) as executor:
+            results = list(executor.map(_search, tasks))
+    result["top_k"] = merge(solver, results, k)
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Résolution partitionnée et parallèle (dénombrement, coût minimal, top-k).")
+    parser.add_argument("--separator", default="Case", choices=COMPONENTS, help="composant sur lequel partitionner")
+    parser.add_argument("--attribute", help="attribut du séparateur définissant les partitions (ex. socket)")
+    parser.add_argument("--parts", type=int, help="nombre de partitions sans attribut (une par processus par défaut)")
+    parser.add_argument("--budget", type=float, help="coût total maximal")
+    parser.add_argument("-k", type=int, default=10, help="nombre de configurations du top-k")
+    parser.add_argument("--outputs", nargs="+", default=list(OUTPUTS), choices=OUTPUTS)
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="nombre de processus")
+    parser.add_argument("--data-dir", default="data", help="dossier des fichiers CSV")
+    args = parser.parse_args(argv)
+
+    result = solve_partitioned(args.separator, args.attribute, args.budget, args.k, args.outputs,
+                               args.workers, args.parts, args.data_dir)
+    print(json.dumps(result, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
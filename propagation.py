@@ -0,0 +1,213 @@
+import numpy as np
+
+from catalog import COMPONENTS, CONSTRAINTS
+from stats import phase
+from tree_solver import TreeSolver
+
+
+class Propagator:
+    """
+    Incremental arc consistency over the constraint graph with vectorized domains.
+
+    Each domain is a boolean mask over the catalog rows of its component. For every arc
+    (source -> target), a support counter holds, per source key (socket, size, wattage...),
+    the number of target rows of the domain compatible with it. Removing values only
+    decrements the counters of the arcs pointing at their component, and only the source
+    keys dropping to zero lose their rows (support counters kept at key level, both directions).
+
+    Every removal is recorded on a trail, so undoing a selection restores the domains
+    and counters in time proportional to what was removed.
+
+    With a budget, every value whose cheapest completion (given by the tree solver over
+    the current domains) exceeds it is removed as well. On a tree this pruning keeps the
+    domains arc consistent: the cheapest completion of a remaining value only uses values
+    that fit the budget too. The solver tables are built once and then updated from the
+    rows each selection (or undo) removes (or restores), so only the values whose
+    completion moved are checked against the budget again. Given a solver built over the
+    initial domains, they start from copies of its tables instead.
+
+    Given a `Stats` object, revisions per arc, pruned values per component and the
+    time of each phase are recorded on it.
+    """
+
+    def __init__(self, catalog, domains=None, budget=None, stats=None, solver=None):
+        """
+        Arguments:
+        catalog -- the indexed Catalog.
+        domains -- optional dictionary restricting the ids allowed for some components.
+        budget -- optional maximum total cost of the configuration.
+        stats -- optional Stats collecting counters and timings (see stats.py).
+        solver -- optional TreeSolver over the same domains, whose tables seed the budget bounds.
+        """
+        self.catalog = catalog
+        self.budget = budget
+        self.stats = stats
+        self.solver = solver
+        self.completions = None
+        self.bounds = None
+        self.changes = []
+        domains = domains or {}
+        self.domains = {component: catalog.mask(component, domains.get(component)).copy() for component in COMPONENTS}
+        self.arcs = [(s, t) for (s, t) in CONSTRAINTS] + [(t, s) for (s, t) in CONSTRAINTS]
+        self.incoming = {component: [(s, t) for (s, t) in self.arcs if t == component] for component in COMPONENTS}
+        self.support = {}
+        for source, target in self.arcs:
+            relation = catalog.relation(source, target)
+            keys, counts = self._key_counts(relation, self.domains[target])
+            self.support[source, target] = relation.key_matrix[:, keys].astype(np.int64) @ counts
+        self.trail = [[]]
+
+    @staticmethod
+    def _key_counts(relation, rows):
+        """Target keys present in `rows` (mask or positions) and their number of rows."""
+        return np.unique(relation.target_codes[rows], return_counts=True)
+
+    def _remove(self, component, positions, queue):
+        """Removes rows from a domain, records them on the trail and updates the counters."""
+        self.domains[component][positions] = False
+        self.trail[-1].append((component, positions))
+        if self.budget is not None:
+            self.changes.append((component, positions))
+        if self.stats is not None:
+            self.stats.count("pruned_values", component, len(positions))
+        for source, target in self.incoming[component]:
+            if self.stats is not None:
+                self.stats.count("revisions", f"{source}->{target}")
+            relation = self.catalog.relation(source, target)
+            keys, counts = self._key_counts(relation, positions)
+            affected = relation.key_matrix[:, keys]
+            support = self.support[source, target]
+            support -= affected.astype(np.int64) @ counts
+            unsupported = affected.any(axis=1) & (support == 0)
+            if unsupported.any():
+                queue.append((source, np.flatnonzero(self.domains[source] & unsupported[relation.source_codes])))
+
+    def _run(self, queue):
+        """Applies queued removals until a fixpoint. Returns False if a domain becomes empty."""
+        while queue:
+            component, positions = queue.pop()
+            positions = positions[self.domains[component][positions]]
+            if not len(positions):
+                continue
+            self._remove(component, positions, queue)
+            if not self.domains[component].any():
+                return False
+        return True
+
+    def propagate(self):
+        """
+        Removes every value without support on some arc (initial propagation).
+        Returns False if a domain becomes empty.
+        """
+        with phase(self.stats, "mac_initial_propagation"):
+            return self._propagate()
+
+    def _propagate(self):
+        queue = []
+        for source, target in self.arcs:
+            relation = self.catalog.relation(source, target)
+            unsupported = (self.support[source, target] == 0)[relation.source_codes]
+            queue.append((source, np.flatnonzero(self.domains[source] & unsupported)))
+        return self._run(queue) and self._enforce_budget()
+
+    def _update_bounds(self):
+        """
+        Updates the budget bounds from the domain changes since the last call (the
+        first call builds them, or copies the tables of the initial solver). Returns, per component, the rows whose completion may have changed.
+        """
+        changed = {}
+        for component, positions in self.changes:
+            changed.setdefault(component, []).append(positions)
+        changed = {component: np.concatenate(rows) for component, rows in changed.items()}
+        self.changes = []
+        if self.bounds is None:
+            # The bounds share the domain masks, which the propagator changes in place
+            if self.solver is None:
+                self.bounds = TreeSolver(self.catalog, self.domains, stats=self.stats)
+            else:
+                self.bounds = self.solver.copy(self.domains)
+                self.bounds.update_domains(changed)
+            return {component: np.arange(len(domain)) for component, domain in self.domains.items()}
+        return self.bounds.update_domains(changed)
+
+    def _enforce_budget(self):
+        """
+        Removes the values whose cheapest completion exceeds the budget, after updating
+        the completion costs from the rows removed since the last call.
+        Returns False if a domain becomes empty.
+        """
+        if self.budget is None:
+            self.completions = None
+            return True
+        while True:
+            with phase(self.stats, "mac_budget_bounds"):
+                changed = self._update_bounds()
+            self.completions = self.bounds.completions
+            queue = []
+            for component, rows in changed.items():
+                rows = rows[self.domains[component][rows]]
+                over = rows[self.completions[component][rows] > self.budget + 1e-9]
+                if len(over):
+                    queue.append((component, over))
+            if not queue:
+                return True
+            if not self._run(queue):
+                return False
+
+    def assign(self, component, component_id):
+        """
+        Fixes the value of a component and propagates the removals, as one undoable step.
+        Returns False if a domain becomes empty (the step can still be undone).
+        """
+        with phase(self.stats, "mac_selection_propagation"):
+            consistent = self._assign(component, component_id)
+        if self.stats is not None:
+            self.stats.record_step(f"{component}={component_id}", self.sizes())
+        return consistent
+
+    def _assign(self, component, component_id):
+        self.trail.append([])
+        others = self.domains[component].copy()
+        others[self.catalog.position[component][component_id]] = False
+        return self._run([(component, np.flatnonzero(others))]) and self._enforce_budget()
+
+    def undo(self):
+        """Restores the domains as they were before the last `assign`."""
+        if len(self.trail) == 1:
+            raise IndexError("nothing to undo")
+        for component, positions in reversed(self.trail.pop()):
+            self.domains[component][positions] = True
+            if self.budget is not None:
+                self.changes.append((component, positions))
+            for source, target in self.incoming[component]:
+                relation = self.catalog.relation(source, target)
+                keys, counts = self._key_counts(relation, positions)
+                self.support[source, target] += relation.key_matrix[:, keys].astype(np.int64) @ counts
+        if self.bounds is not None:
+            self._update_bounds()
+            self.completions = self.bounds.completions
+        else:
+            self.completions = None
+
+    def depth(self):
+        """Number of steps that can be undone."""
+        return len(self.trail) - 1
+
+    def cheapest_completion(self, component, component_id):
+        """Returns the cost of the cheapest configuration within the domains using this component."""
+        if self.completions is None:
+            self.completions = TreeSolver(self.catalog, self.domains).completions
+        return float(self.completions[component][self.catalog.position[component][component_id]])
+
+    def sizes(self):
+        """Returns the number of values remaining in each domain."""
+        return {component: int(domain.sum()) for component, domain in self.domains.items()}
+
+    def ids(self, component):
+        """Returns the ids remaining in the domain of a component."""
+        return self.catalog.ids[component][self.domains[component]].tolist()
+
+    def __contains__(self, item):
+        component, component_id = item
+        position = self.catalog.position[component].get(component_id)
+        return position is not None and bool(self.domains[component][position])
@@ -0,0 +1,51 @@
+import numpy as np
+
+from catalog import COMPONENTS
+
+
+class SolutionIndex:
+    """
+    Compact, filterable set of configurations.
+
+    Configurations are stored as a 2-D integer array (one row per configuration, one column
+    of ids per component, in COMPONENTS order). Each column has a posting list per id, kept
+    as a single argsort of the column: the rows using one id are a contiguous slice of it,
+    in increasing row order. Selecting a component intersects the live rows with one
+    posting list, and the options of a component are the distinct ids of the live rows.
+    """
+
+    def __init__(self, rows):
+        """
+        Arguments:
+        rows -- array of shape (configurations, len(COMPONENTS)) holding the ids.
+        """
+        self.rows = np.asarray(rows, dtype=np.int64).reshape(-1, len(COMPONENTS))
+        self.live = np.arange(len(self.rows))
+        self._postings = {}
+
+    def __len__(self):
+        """Number of configurations matching the current selection."""
+        return len(self.live)
+
+    def _posting_list(self, component, component_id):
+        """Rows using one id of a component, in increasing order."""
+        column = COMPONENTS.index(component)
+        if column not in self._postings:
+            order = np.argsort(self.rows[:, column], kind="stable")
+            self._postings[column] = (order, self.rows[order, column])
+        order, values = self._postings[column]
+        start, end = np.searchsorted(values, [component_id, component_id + 1])
+        return order[start:end]
+
+    def select(self, component, component_id):
+        """
+        Keeps only the configurations using this component.
+        Returns False if none is left.
+        """
+        self.live = np.intersect1d(self.live, self._posting_list(component, component_id), assume_unique=True)
+        return len(self.live) > 0
+
+    def options(self, component):
+        """Returns the ids of a component used by the remaining configurations (sorted)."""
+        return np.unique(self.rows[self.live, COMPONENTS.index(component)]).tolist()
+
@@ -0,0 +1,125 @@
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+
+class Stats:
+    """
+    Counters and timers of one configuration session.
+
+    Disabled by default: the engines take an optional `stats` argument and only record
+    when it is given, so a session without `--stats` pays a single `is None` test per
+    instrumented call.
+
+    Collected data:
+    counters -- named counters, each keyed by an edge or a component
+                (predicate calls, revisions per arc, pruned values per component...).
+    times -- total wall time (seconds) and number of calls of each phase.
+    peaks -- maximum values observed (heap sizes, traced memory in bytes...).
+    steps -- domain sizes per component after each selection.
+    """
+
+    def __init__(self):
+        self.counters = {}
+        self.times = {}
+        self.peaks = {}
+        self.steps = []
+
+    def count(self, name, key, n=1):
+        counter = self.counters.setdefault(name, {})
+        counter[key] = counter.get(key, 0) + n
+
+    def peak(self, name, value):
+        self.peaks[name] = max(self.peaks.get(name, value), value)
+
+    @contextmanager
+    def phase(self, name, memory=False):
+        """
+        Times a block of code. With `memory`, the peak memory allocated during the block
+        is traced as well (peak `<name>_bytes`).
+        """
+        tracing = memory and not tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.start()
+        elif memory:
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            total, calls = self.times.get(name, (0.0, 0))
+            self.times[name] = (total + elapsed, calls + 1)
+            if memory:
+                self.peak(f"{name}_bytes", tracemalloc.get_traced_memory()[1])
+                if tracing:
+                    tracemalloc.stop()
+
+    def record_step(self, label, sizes):
+        """Records the domain size of every component after a step (e.g. a selection)."""
+        self.steps.append({"step": label, "domains": dict(sizes)})
+
+    def to_dict(self):
+        return {
+            "counters": self.counters,
+            "times": {name: {"seconds": total, "calls": calls} for name, (total, calls) in self.times.items()},
+            "peaks": self.peaks,
+            "steps": self.steps,
+        }
+
+    def dump(self, path):
+        """Writes the statistics as JSON ('-' for the standard output)."""
+        text = json.dumps(self.to_dict(), indent=2, ensure_ascii=False)
+        if path == "-":
+            print(text)
+        else:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(text + "\n")
+
+    def summary(self):
+        """Returns a human-readable summary of the statistics."""
+        lines = ["📈 Statistiques de la session"]
+        for name, (total, calls) in sorted(self.times.items(), key=lambda item: -item[1][0]):
+            lines.append(f"⏱️  {name}: {total * 1000:.3f} ms ({calls} appel(s))")
+        for name, counter in self.counters.items():
+            detail = ", ".join(f"{key}: {value}" for key, value in counter.items())
+            lines.append(f"🔢 {name} ({sum(counter.values())}) : {detail}")
+        for name, value in self.peaks.items():
+            lines.append(f"📊 {name} (max) : {value}")
+        for step in self.steps:
+            sizes = ", ".join(f"{component}: {size}" for component, size in step["domains"].items())
+            lines.append(f"🧩 {step['step']} -> {sizes}")
+        return "\n".join(lines)
+
+
+def phase(stats, name, memory=False):
+    """Times a block with `stats`, or does nothing when statistics are disabled."""
+    return nullcontext() if stats is None else stats.phase(name, memory)
+
+
+def record_catalog(stats, catalog):
+    """Records the predicate calls made while building the compatibility relations of the catalog."""
+    for (source, target), calls in catalog.predicate_calls.items():
+        stats.count("predicate_calls", f"{source}-{target}", calls)
+
+
+def add_arguments(parser):
+    """Adds the `--stats` and `--stats-json` options to a command-line parser."""
+    parser.add_argument("--stats", action="store_true", help="affiche les statistiques de la session à la fin")
+    parser.add_argument("--stats-json", metavar="FICHIER", help="écrit les statistiques en JSON ('-' pour la sortie standard)")
+
+
+def from_arguments(args):
+    """Returns a Stats object if the command line asks for statistics, None otherwise."""
+    return Stats() if args.stats or args.stats_json else None
+
+
+def report(stats, args):
+    """Prints and/or dumps the statistics as asked on the command line."""
+    if stats is None:
+        return
+    if args.stats:
+        print("\n" + stats.summary())
+    if args.stats_json:
+        stats.dump(args.stats_json)
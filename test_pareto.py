@@ -0,0 +1,47 @@
+import itertools
+
+import pytest
+
+from catalog import COMPONENTS, CONSTRAINTS, Catalog
+from generate_catalog import generate_catalog
+from pareto import OBJECTIVES, ParetoSolver, _number
+from tree_solver import TreeSolver
+
+
+def _vector(catalog, configuration, objectives):
+    """Cost and objective values of a configuration, read from its rows (rounded against summation order)."""
+    values = [catalog.cost(configuration)]
+    for objective in objectives:
+        values.append(sum(weight * _number(catalog.row(component, configuration[component])[column])
+                          for component, column, weight in OBJECTIVES[objective]))
+    return tuple(round(value, 6) for value in values)
+
+
+def _skyline(catalog, objectives, budget=None):
+    """Distinct non-dominated vectors of the valid configurations, by enumerating the cartesian product."""
+    vectors = set()
+    for combination in itertools.product(*(catalog.ids[component].tolist() for component in COMPONENTS)):
+        configuration = dict(zip(COMPONENTS, combination))
+        if all(catalog.compatible(s, configuration[s], t, configuration[t]) for s, t in CONSTRAINTS):
+            vector = _vector(catalog, configuration, objectives)
+            if budget is None or vector[0] <= budget:
+                vectors.add(vector)
+
+    def dominates(a, b):
+        return a != b and a[0] <= b[0] and all(x >= y for x, y in zip(a[1:], b[1:]))
+
+    return {vector for vector in vectors if not any(dominates(other, vector) for other in vectors)}
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+@pytest.mark.parametrize("objectives", [tuple(OBJECTIVES), ("cores",), ("capacity", "headroom")])
+@pytest.mark.parametrize("margin", [None, 300])
+def test_frontier_matches_brute_force_skyline(seed, objectives, margin):
+    catalog = Catalog(generate_catalog(5, 0.5, seed))
+    budget = None if margin is None else TreeSolver(catalog).min_cost() + margin
+    frontier = ParetoSolver(catalog, objectives, budget=budget).frontier()
+    vectors = [_vector(catalog, result["configuration"], objectives) for result in frontier]
+    assert sorted(vectors) == sorted(_skyline(catalog, objectives, budget))
+    for result, vector in zip(frontier, vectors):
+        assert (result["cost"], *(round(result[objective], 6) for objective in objectives)) == vector
+    assert [result["cost"] for result in frontier] == sorted(result["cost"] for result in frontier)
@@ -0,0 +1,34 @@
+import multiprocessing
+
+import numpy as np
+import pytest
+
+import partitioned_solver
+from catalog import COMPONENTS, Catalog
+from generate_catalog import generate_catalog
+from partitioned_solver import merge, partitions, search_partition
+from tree_solver import TreeSolver
+
+
+@pytest.mark.parametrize("separator", COMPONENTS)
+@pytest.mark.parametrize("budget, k", [(None, 50), (900, 200), (None, 1)])
+def test_partitions_with_shared_bound_match_top_k(separator, budget, k, monkeypatch):
+    monkeypatch.setattr(partitioned_solver, "BLOCK_SIZE", 8)
+    catalog = Catalog(generate_catalog(30, 0.4, 7))
+    solver = TreeSolver(catalog, root=separator)
+    progress = multiprocessing.Array("d", [0, -np.inf, np.inf])
+    results = [
+        search_partition(solver, np.flatnonzero(catalog.mask(separator, ids)), budget, k, progress)
+        for ids in partitions(catalog, separator, n_parts=4, costs=solver.subtree_cost[separator])
+    ]
+    merged = merge(solver, results, k)
+    expected = list(TreeSolver(catalog).top_k(budget, k))
+    assert [solution["cost"] for solution in merged] == [cost for cost, _ in expected]
+    assert all(catalog.cost(solution["configuration"]) == solution["cost"] for solution in merged)
+
+
+def test_partitions_cover_every_value_once():
+    catalog = Catalog(generate_catalog(30, 0.4, 7))
+    groups = partitions(catalog, "Case", n_parts=4, costs=TreeSolver(catalog, root="Case").subtree_cost["Case"])
+    assert sorted(sum(groups, [])) == catalog.ids["Case"].tolist()
+    assert len(groups) == 4
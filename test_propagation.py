@@ -0,0 +1,46 @@
+import random
+
+import numpy as np
+import pytest
+
+from catalog import COMPONENTS, Catalog
+from generate_catalog import generate_catalog
+from propagation import Propagator
+from tree_solver import TreeSolver
+
+
+@pytest.mark.parametrize("seeded", [False, True])
+def test_budget_bounds_match_fresh_propagation(seeded):
+    catalog = Catalog(generate_catalog(40, 0.4, 5))
+    base = TreeSolver(catalog)
+    initial = {component: table.copy() for component, table in base.completions.items()}
+    budget = base.min_cost() + 600
+    propagator = Propagator(catalog, budget=budget, solver=base if seeded else None)
+    assert propagator.propagate()
+    rng = random.Random(2)
+    selection = {}
+    for _ in range(30):
+        if selection and rng.random() < 0.3:
+            propagator.undo()
+            selection.popitem()
+        else:
+            free = [component for component in COMPONENTS if component not in selection]
+            if not free:
+                continue
+            component = rng.choice(free)
+            component_id = rng.choice(propagator.ids(component))
+            if not propagator.assign(component, component_id):
+                propagator.undo()
+                continue
+            selection[component] = component_id
+
+        reference = Propagator(catalog, {component: [component_id] for component, component_id in selection.items()},
+                               budget=budget)
+        assert reference.propagate()
+        completions = TreeSolver(catalog, propagator.domains).completions
+        for component in COMPONENTS:
+            assert propagator.ids(component) == reference.ids(component)
+            domain = propagator.domains[component]
+            assert np.array_equal(propagator.completions[component][domain], completions[component][domain])
+    # The bounds of the propagator are copies: the tables they started from are unchanged
+    assert all(np.array_equal(base.completions[component], initial[component]) for component in COMPONENTS)
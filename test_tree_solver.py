@@ -0,0 +1,136 @@
+import itertools
+import random
+
+import numpy as np
+import pytest
+
+from catalog import COMPONENTS, CONSTRAINTS, Catalog
+from catalog_cache import load_cached_catalog
+from generate_catalog import generate_catalog, write_catalog
+from tree_solver import TreeSolver
+
+
+def _catalog(size, density=0.5, seed=0):
+    return Catalog(generate_catalog(size, density, seed))
+
+
+def _rebuilt(catalog):
+    """Catalog built from scratch from the current rows of `catalog`."""
+    return Catalog({component: [dict(row) for row in catalog.records[component]] for component in COMPONENTS})
+
+
+def _brute_force(catalog, domains=None):
+    """Every valid configuration with its cost, by enumerating the cartesian product."""
+    domains = domains or {}
+    ids = [domains.get(component, catalog.ids[component].tolist()) for component in COMPONENTS]
+    solutions = []
+    for combination in itertools.product(*ids):
+        configuration = dict(zip(COMPONENTS, combination))
+        if all(catalog.compatible(s, configuration[s], t, configuration[t]) for s, t in CONSTRAINTS):
+            solutions.append((catalog.cost(configuration), configuration))
+    return solutions
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_count_and_min_cost_match_brute_force(seed):
+    catalog = _catalog(5, 0.5, seed)
+    solutions = _brute_force(catalog)
+    solver = TreeSolver(catalog)
+    assert solver.count() == len(solutions)
+    if not solutions:
+        assert solver.min_cost() is None and solver.min_cost_configuration() is None
+        return
+    assert solver.min_cost() == min(cost for cost, _ in solutions)
+    assert catalog.cost(solver.min_cost_configuration()) == solver.min_cost()
+    for component in COMPONENTS:
+        for component_id in catalog.ids[component].tolist():
+            costs = [cost for cost, configuration in solutions if configuration[component] == component_id]
+            assert solver.cheapest_completion(component, component_id) == min(costs, default=np.inf)
+
+
+def test_restricted_domains_match_brute_force():
+    catalog = _catalog(5, 0.5, 3)
+    domains = {"CPU": [1, 2, 3], "PSU": [2, 4]}
+    solutions = _brute_force(catalog, domains)
+    solver = TreeSolver(catalog, domains)
+    assert solver.count() == len(solutions)
+    assert solver.min_cost() == min((cost for cost, _ in solutions), default=None)
+
+
+@pytest.mark.parametrize("budget, k", [(None, None), (None, 7), (1800, None), (1800, 3)])
+def test_top_k_matches_brute_force(budget, k):
+    catalog = _catalog(5, 0.5, 0)
+    solutions = sorted(
+        (cost for cost, _ in _brute_force(catalog) if budget is None or cost <= budget)
+    )[:k]
+    results = list(TreeSolver(catalog).top_k(budget, k))
+    assert [cost for cost, _ in results] == solutions
+    for cost, configuration in results:
+        assert catalog.cost(configuration) == cost
+        assert all(catalog.compatible(s, configuration[s], t, configuration[t]) for s, t in CONSTRAINTS)
+
+
+def test_top_k_with_partial_selection():
+    catalog = _catalog(5, 0.5, 0)
+    selection = {"Motherboard": int(TreeSolver(catalog).min_cost_configuration()["Motherboard"])}
+    expected = sorted(cost for cost, configuration in _brute_force(catalog)
+                      if configuration["Motherboard"] == selection["Motherboard"])
+    results = list(TreeSolver(catalog).top_k(partial_selection=selection))
+    assert [cost for cost, _ in results] == expected
+    assert all(configuration["Motherboard"] == selection["Motherboard"] for _, configuration in results)
+
+
+def _random_delta(catalog, extra, rng, next_id):
+    component = rng.choice(COMPONENTS)
+    draw = rng.random()
+    if draw < 0.5:
+        return {"op": "price", "component": component, "id": rng.choice(catalog.ids[component].tolist()),
+                "price": rng.randint(10, 900)}
+    if draw < 0.75 or len(catalog.ids[component]) < 3:
+        return {"op": "add", "component": component, "row": dict(rng.choice(extra[component]), id=next_id)}
+    return {"op": "remove", "component": component, "id": rng.choice(catalog.ids[component].tolist())}
+
+
+def _assert_same_tables(solver, reference):
+    assert solver.count() == reference.count()
+    assert solver.min_cost() == reference.min_cost()
+    for component in COMPONENTS:
+        assert np.array_equal(solver.catalog.ids[component], reference.catalog.ids[component])
+        assert np.array_equal(solver.completions[component], reference.completions[component])
+    for source, target in CONSTRAINTS:
+        relation, expected = solver.catalog.relation(source, target), reference.catalog.relation(source, target)
+        assert np.array_equal(relation.key_matrix[np.ix_(relation.source_codes, relation.target_codes)],
+                              expected.key_matrix[np.ix_(expected.source_codes, expected.target_codes)])
+    assert [cost for cost, _ in solver.top_k(k=20)] == [cost for cost, _ in reference.top_k(k=20)]
+
+
+@pytest.mark.parametrize("compiled", [False, True])
+def test_deltas_match_full_rebuild(compiled, tmp_path):
+    data = generate_catalog(30, 0.4, 3)
+    if compiled:
+        write_catalog(data, tmp_path)
+        catalog = load_cached_catalog(tmp_path)
+    else:
+        catalog = Catalog(data)
+    extra = generate_catalog(30, 0.2, 9)
+    solver = TreeSolver(catalog)
+    rng = random.Random(1)
+    for step in range(200):
+        solver.apply(_random_delta(catalog, extra, rng, 1000 + step))
+        if step % 20 == 19:
+            _assert_same_tables(solver, TreeSolver(_rebuilt(catalog)))
+
+
+def test_deltas_update_completions_in_place(monkeypatch):
+    catalog = Catalog(generate_catalog(30, 0.4, 4))
+    extra = generate_catalog(30, 0.2, 8)
+    solver = TreeSolver(catalog)
+    solver.completions
+    # Once computed, the completions are only updated: a full top-down pass would hide a stale table
+    monkeypatch.setattr(solver, "_solve_completions", lambda: pytest.fail("completions recomputed"))
+    rng = random.Random(2)
+    for step in range(200):
+        solver.apply(_random_delta(catalog, extra, rng, 1000 + step))
+        reference = TreeSolver(_rebuilt(catalog))
+        for component in COMPONENTS:
+            assert np.array_equal(solver.completions[component], reference.completions[component])
@@ -0,0 +1,637 @@
+import copy
+import heapq
+import itertools
+
+import numpy as np
+
+from catalog import COMPONENTS, adjacent
+from solution_index import SolutionIndex
+from stats import phase
+
+# The constraint graph is a tree: rooted at the motherboard, CPU, RAM and Case hang
+# below it, the PSU below the Case and the GPU below the PSU.
+ROOT = "Motherboard"
+
+
+def _union(size, parts):
+    """Sorted positions (below `size`) appearing in any of the arrays of `parts`."""
+    parts = [rows for rows in parts if len(rows)]
+    if not parts:
+        return np.empty(0, dtype=np.intp)
+    mask = np.zeros(size, dtype=bool)
+    for rows in parts:
+        mask[rows] = True
+    return np.flatnonzero(mask)
+
+
+def tree_structure(root=ROOT):
+    """
+    Orients the constraint graph from `root`.
+    Returns the parent of each component, the children of each component and
+    the components in breadth-first order (every parent before its children).
+    """
+    if root not in COMPONENTS:
+        raise ValueError(f"unknown component {root!r}")
+    parent = {root: None}
+    children = {component: [] for component in COMPONENTS}
+    order = [root]
+    for component in order:
+        for neighbour in adjacent(component):
+            if neighbour not in parent:
+                parent[neighbour] = component
+                children[component].append(neighbour)
+                order.append(neighbour)
+    return parent, children, order
+
+
+class TreeSolver:
+    """
+    Dynamic programming over the constraint tree.
+
+    One bottom-up pass gives, for every value, the number of valid completions of its
+    subtree and the cheapest one; a top-down pass adds the cheapest completion of the
+    rest of the tree. Every pass aggregates along the key-level relations of the catalog,
+    so the cost is polynomial in the domain sizes instead of their product.
+
+    Given a `Stats` object, the time of each pass and the size of the best-first search
+    are recorded on it.
+    """
+
+    def __init__(self, catalog, domains=None, root=ROOT, stats=None):
+        """
+        Arguments:
+        catalog -- the indexed Catalog.
+        domains -- optional dictionary restricting the ids allowed for some components.
+        root -- the component the tree is rooted at.
+        stats -- optional Stats collecting counters and timings (see stats.py).
+        """
+        self.catalog = catalog
+        self.root = root
+        self.stats = stats
+        self.parent, self.children, self.order = tree_structure(root)
+        domains = domains or {}
+        self.domains = {component: catalog.mask(component, domains.get(component)) for component in COMPONENTS}
+        with phase(stats, "solver_subtree_tables"):
+            self._solve_subtrees()
+        self._completions = None
+
+    def _count_dtype(self):
+        # Exact counts may overflow int64 on large catalogs: fall back to Python integers
+        bound = 1
+        for mask in self.domains.values():
+            bound *= int(mask.sum())
+        return np.int64 if bound < 2 ** 62 else object
+
+    def _solve_subtrees(self):
+        """Bottom-up pass: counts and cheapest costs of every subtree."""
+        self.count_dtype = self._count_dtype()
+        self.subtree_cost = {}
+        self.subtree_count = {}
+        self.child_cost = {}
+        self.child_count = {}
+        self.best_child = {}
+        self.key_tables = {}
+        self.stale_counts = False
+        for component in reversed(self.order):
+            for child in self.children[component]:
+                self._solve_edge(component, child)
+            self._solve_node(component)
+
+    def _solve_edge(self, component, child):
+        """
+        Aggregates the tables of a child subtree over the rows of its parent. The key-level
+        minima (per child key, then per parent key) are kept for incremental updates.
+        """
+        relation = self.catalog.relation(component, child)
+        self.key_tables[child] = self._solve_minima(relation, self.subtree_cost[child])
+        _, _, source_min, source_arg = self.key_tables[child]
+        self.child_cost[child] = source_min[relation.source_codes]
+        self.best_child[child] = source_arg[relation.source_codes]
+        self.child_count[child] = relation.reduce_sum(self.subtree_count[child])
+
+    @staticmethod
+    def _solve_minima(relation, values):
+        """
+        Key-level minima of `values` (one per target row of the relation): per target key,
+        then per source key over the compatible target keys, with the rows reaching them.
+        """
+        key_min, key_arg = relation.key_min(values)
+        source_min, source_arg = relation.source_key_min(key_min, key_arg)
+        return key_min, key_arg, source_min, source_arg
+
+    def _solve_node(self, component):
+        """Combines the own price of every row of a component with the tables of its children."""
+        domain = self.domains[component]
+        cost = np.where(domain, self.catalog.arrays[component]["price"], np.inf)
+        for child in self.children[component]:
+            cost = cost + self.child_cost[child]
+        self.subtree_cost[component] = cost
+        count = domain.astype(self.count_dtype)
+        for child in self.children[component]:
+            count = count * self.child_count[child]
+        self.subtree_count[component] = count
+
+    def _update_rows(self, component, rows):
+        """Recomputes the subtree cost of some rows of a component. Returns the rows whose cost changed."""
+        cost = self.catalog.arrays[component]["price"][rows]
+        for child in self.children[component]:
+            cost = cost + self.child_cost[child][rows]
+        cost = np.where(self.domains[component][rows], cost, np.inf)
+        changed = cost != self.subtree_cost[component][rows]
+        self.subtree_cost[component][rows] = cost
+        return rows[changed]
+
+    def _update_minima(self, relation, tables, values, rows):
+        """
+        Propagates a change of `values` at some target rows of the relation to its key-level
+        minima (see `_solve_minima`). Returns the source rows whose minimum changed.
+        """
+        key_min, key_arg, source_min, source_arg = tables
+        keys = _union(relation.key_matrix.shape[1], [relation.target_codes[rows]])
+        new_min, new_arg = relation.key_min(values, keys)
+        keys = keys[(new_min[keys] != key_min[keys]) | (new_arg[keys] != key_arg[keys])]
+        if not len(keys):
+            return keys
+        key_min[keys], key_arg[keys] = new_min[keys], new_arg[keys]
+
+        source_keys = np.flatnonzero(relation.key_matrix[:, keys].any(axis=1))
+        new_min, new_arg = relation.source_key_min(key_min, key_arg, source_keys)
+        changed = (new_min != source_min[source_keys]) | (new_arg != source_arg[source_keys])
+        source_keys = source_keys[changed]
+        source_min[source_keys], source_arg[source_keys] = new_min[changed], new_arg[changed]
+        return self.catalog.relation(relation.target, relation.source).target_rows(source_keys)
+
+    def _update_edge(self, component, child, rows):
+        """
+        Propagates a change of the subtree cost of some child rows to the key-level minima
+        of their edge. Returns the parent rows (within the domain, the only ones whose
+        row-level tables are kept up to date) whose cheapest child completion changed.
+        """
+        relation = self.catalog.relation(component, child)
+        parent_rows = self._update_minima(relation, self.key_tables[child], self.subtree_cost[child], rows)
+        parent_rows = parent_rows[self.domains[component][parent_rows]]
+        self._refresh_child(component, child, parent_rows)
+        return parent_rows
+
+    def _refresh(self, component):
+        """
+        Recomputes the tables touched by rows added to or removed from one component: the
+        aggregates of its children (indexed by its rows), its own tables and the path up
+        to the root. The other subtrees are left as they are, and the completions, once
+        computed, are updated from the rows whose costs moved (see `_update_completions`).
+        """
+        if self.stale_counts or self._count_dtype() != self.count_dtype:
+            self._solve_subtrees()
+            self._completions = None
+            return
+        # The tables are replaced, not changed in place: the previous ones give the rows that moved
+        subtree_cost, child_cost = dict(self.subtree_cost), dict(self.child_cost)
+        resized = component
+        for child in self.children[component]:
+            self._solve_edge(component, child)
+        while True:
+            self._solve_node(component)
+            parent = self.parent[component]
+            if parent is None:
+                break
+            self._solve_edge(parent, component)
+            component = parent
+        if self._completions is None:
+            return
+
+        empty = np.empty(0, dtype=np.intp)
+        changed = {component: empty for component in COMPONENTS}
+        changed[resized] = np.arange(len(self.domains[resized]))
+        moved, cost_moved = {}, {}
+        for component in COMPONENTS:
+            parent = self.parent[component]
+            if component == resized:
+                cost_moved[component] = changed[resized]
+            else:
+                cost_moved[component] = np.flatnonzero(self.subtree_cost[component] != subtree_cost[component])
+            if parent is None:
+                moved[component] = empty
+            elif parent == resized:
+                moved[component] = changed[resized]
+            else:
+                moved[component] = np.flatnonzero(self.child_cost[component] != child_cost[component])
+        self._update_completions(changed, moved, cost_moved, resized)
+
+    def update_price(self, component, component_id, price):
+        """
+        Changes the price of a component in the catalog and updates the cost tables
+        (counts do not depend on prices). The change climbs the tree key by key, then
+        the completions, once computed, are updated top-down, so a price tick only
+        touches the rows sharing a key with a changed minimum.
+        Other solvers and propagators built on the same catalog are not updated.
+        """
+        self._update_costs({component: [self.catalog.update_price(component, component_id, price)]})
+
+    def update_domains(self, changed):
+        """
+        Updates the cost tables after rows left or re-entered the domains (the masks the
+        solver was built on, changed in place by their owner, e.g. a Propagator). As with
+        `update_price`, the changes climb the tree key by key; the completions, once
+        computed, are then updated top-down from the rows whose costs moved. Row-level
+        work is limited to the changed rows and to the rows of the domains sharing a key
+        with a changed minimum. Counts are recomputed by the next `count`.
+
+        Arguments:
+        changed -- dictionary mapping components to the positions of their changed rows.
+        Returns, per component, the positions whose cheapest completion may have changed.
+        """
+        self.stale_counts = True
+        if self._completions is None:
+            self._update_costs(changed)
+            return {component: np.arange(len(rows)) for component, rows in self.completions.items()}
+        return self._update_costs(changed)
+
+    def _update_costs(self, changed):
+        """
+        Updates the cost tables after the price or the domain membership of some rows
+        changed (see `update_domains`), then the completions if they were computed.
+        Returns, per component, the positions whose cheapest completion was updated
+        (None when the completions are not computed).
+        """
+        empty = np.empty(0, dtype=np.intp)
+        changed = {component: np.asarray(changed.get(component, empty), dtype=np.intp) for component in COMPONENTS}
+
+        # Bottom-up: subtree costs and cheapest child completions. Row-level tables are
+        # only kept up to date within the domains, so re-entering rows are refreshed first.
+        pending = {component: [changed[component]] for component in COMPONENTS}
+        moved = {}
+        cost_moved = {}
+        for component in reversed(self.order):
+            for child in self.children[component]:
+                self._refresh_child(component, child, changed[component])
+            rows = self._update_rows(component, _union(len(self.domains[component]), pending[component]))
+            cost_moved[component] = rows
+            parent = self.parent[component]
+            moved[component] = empty if parent is None or not len(rows) else self._update_edge(parent, component, rows)
+            if parent is not None:
+                pending[parent].append(moved[component])
+
+        if self._completions is None:
+            return None
+        return self._update_completions(changed, moved, cost_moved)
+
+    def _update_completions(self, changed, moved, cost_moved, resized=None):
+        """
+        Top-down part of the updates: cheapest completion of the rest of the tree above
+        every value, updated from the rows whose own price or domain membership changed
+        (`changed`), whose cheapest child completion moved (`moved`, indexed by the rows of
+        the parent) or whose subtree cost moved (`cost_moved`), per component. The tables
+        indexed by the rows or keys of a `resized` component (rows added or removed) are
+        recomputed on its edges. Returns the positions whose completion was updated.
+        """
+        empty = np.empty(0, dtype=np.intp)
+        if resized == self.root:
+            self.above[self.root] = np.zeros(len(self.domains[self.root]))
+        above_moved = {self.root: empty}
+        for component in self.order:
+            if component != self.root:
+                relation = self.catalog.relation(component, self.parent[component])
+                rows = changed[component]
+                self.above[component][rows] = self.above_tables[component][2][relation.source_codes[rows]]
+            for child in self.children[component]:
+                relation = self.catalog.relation(child, component)
+                if component == resized:
+                    self.rest[child] = self._rest(component, child)
+                else:
+                    rows = [changed[component], above_moved[component]]
+                    rows += [moved[sibling] for sibling in self.children[component] if sibling != child]
+                    rows = _union(len(self.domains[component]), rows)
+                    rest = self._rest(component, child, rows)
+                    moving = rest != self.rest[child][rows]
+                    rows = rows[moving]
+                    self.rest[child][rows] = rest[moving]
+                if resized in (component, child):
+                    # Key-level minima over the rows or keys of the resized component
+                    self.above_tables[child] = self._solve_minima(relation, self.rest[child])
+                    above = self.above_tables[child][2][relation.source_codes]
+                    if child == resized:
+                        child_rows = np.arange(len(above))
+                    else:
+                        child_rows = np.flatnonzero(above != self.above[child])
+                    self.above[child] = above
+                else:
+                    child_rows = self._update_minima(relation, self.above_tables[child], self.rest[child], rows) if len(rows) else empty
+                    self.above[child][child_rows] = self.above_tables[child][2][relation.source_codes[child_rows]]
+                above_moved[child] = child_rows[self.domains[child][child_rows]]
+
+        updated = {}
+        for component in COMPONENTS:
+            if component == resized:
+                self._completions[component] = self.subtree_cost[component] + self.above[component]
+                updated[component] = np.arange(len(self._completions[component]))
+                continue
+            rows = _union(len(self.domains[component]), [changed[component], cost_moved[component], above_moved[component]])
+            self._completions[component][rows] = self.subtree_cost[component][rows] + self.above[component][rows]
+            updated[component] = rows
+        return updated
+
+    def _refresh_child(self, component, child, rows):
+        """Reads the cheapest child completion of some rows of a component from the key-level minima."""
+        source_codes = self.catalog.relation(component, child).source_codes[rows]
+        _, _, source_min, source_arg = self.key_tables[child]
+        self.child_cost[child][rows] = source_min[source_codes]
+        self.best_child[child][rows] = source_arg[source_codes]
+
+    def add_row(self, component, row):
+        """
+        Adds a component to the catalog (allowed in the domain) and updates the tables.
+        Other solvers and propagators built on the same catalog must be rebuilt.
+        """
+        self.catalog.add_row(component, row)
+        self.domains[component] = np.append(self.domains[component], True)
+        self._refresh(component)
+
+    def remove_row(self, component, component_id):
+        """
+        Removes a component from the catalog and updates the tables.
+        Other solvers and propagators built on the same catalog must be rebuilt.
+        """
+        pos = self.catalog.remove_row(component, component_id)
+        self.domains[component] = np.delete(self.domains[component], pos)
+        self._refresh(component)
+
+    def apply(self, update):
+        """
+        Applies one row-level delta, a dictionary with an "op" among "price" (with "component",
+        "id" and "price"), "add" (with "component" and the new "row") and "remove" (with
+        "component" and "id").
+        """
+        op, component = update.get("op"), update.get("component")
+        if component not in COMPONENTS:
+            raise ValueError(f"unknown component {component!r}")
+        if op == "price":
+            self.update_price(component, update["id"], update["price"])
+        elif op == "add":
+            self.add_row(component, update["row"])
+        elif op == "remove":
+            self.remove_row(component, update["id"])
+        else:
+            raise ValueError(f"unknown update {op!r}")
+
+    def count(self):
+        """Returns the exact number of valid configurations."""
+        if self.stale_counts:
+            self._solve_subtrees()
+        return int(self.subtree_count[self.root].sum())
+
+    def min_cost_configuration(self):
+        """Returns the cheapest valid configuration, or None if there is none."""
+        root_cost = self.subtree_cost[self.root]
+        if not len(root_cost) or not np.isfinite(root_cost.min()):
+            return None
+        positions = {self.root: int(root_cost.argmin())}
+        for component in self.order[1:]:
+            positions[component] = int(self.best_child[component][positions[self.parent[component]]])
+        return {component: int(self.catalog.ids[component][positions[component]]) for component in COMPONENTS}
+
+    def min_cost(self):
+        """Returns the cost of the cheapest valid configuration, or None if there is none."""
+        configuration = self.min_cost_configuration()
+        return None if configuration is None else self.catalog.cost(configuration)
+
+    def cheapest(self, budget=None):
+        """
+        Returns the cheapest valid configuration and its cost, as a dictionary with the
+        "configuration" and its "cost" (both None if there is none within the budget).
+        """
+        configuration = self.min_cost_configuration()
+        cost = None if configuration is None else self.catalog.cost(configuration)
+        if cost is not None and budget is not None and cost > budget:
+            configuration, cost = None, None
+        return {"configuration": configuration, "cost": cost}
+
+    @property
+    def completions(self):
+        """
+        Cheapest full configuration containing each value, per component
+        (array aligned with the catalog rows, inf when the value has no valid completion).
+        """
+        if self._completions is None:
+            with phase(self.stats, "solver_completion_tables"):
+                self._completions = self._solve_completions()
+        return self._completions
+
+    def _solve_completions(self):
+        """
+        Top-down pass: cheapest cost of the rest of the tree above every value. The key-level
+        minima of every edge are kept for incremental updates (see `update_domains`).
+        """
+        self.above = {self.root: np.zeros(len(self.domains[self.root]))}
+        self.rest = {}
+        self.above_tables = {}
+        for component in self.order:
+            for child in self.children[component]:
+                self.rest[child] = self._rest(component, child)
+                relation = self.catalog.relation(child, component)
+                self.above_tables[child] = self._solve_minima(relation, self.rest[child])
+                self.above[child] = self.above_tables[child][2][relation.source_codes]
+        return {component: self.subtree_cost[component] + self.above[component] for component in COMPONENTS}
+
+    def _rest(self, component, child, rows=None):
+        """
+        Cheapest cost of the rows of a component (all of them, or only `rows`) together
+        with the rest of the tree, outside the subtree of one of its children.
+        """
+        rows = slice(None) if rows is None else rows
+        rest = self.catalog.arrays[component]["price"][rows] + self.above[component][rows]
+        for sibling in self.children[component]:
+            if sibling != child:
+                rest = rest + self.child_cost[sibling][rows]
+        return np.where(self.domains[component][rows], rest, np.inf)
+
+    def cheapest_completion(self, component, component_id):
+        """Returns the cost of the cheapest valid configuration using this component (inf if none)."""
+        return float(self.completions[component][self.catalog.position[component][component_id]])
+
+    def restricted(self, partial_selection):
+        """Returns a solver whose domains are further restricted to a partial selection."""
+        domains = dict(self.domains)
+        for component, component_id in partial_selection.items():
+            domains[component] = domains[component] & self.catalog.mask(component, [component_id])
+        return TreeSolver(self.catalog, domains, self.root, self.stats)
+
+    def copy(self, domains=None):
+        """
+        Returns a solver starting from copies of the tables of this one, so that several
+        owners (e.g. the sessions of a server) can update their own tables from ones built once.
+
+        Arguments:
+        domains -- optional domain masks of the copy (copies of the domains of this solver
+                   by default). They must hold the same values as these domains: later
+                   changes are passed to `update_domains` of the copy.
+        """
+        solver = copy.copy(self)
+        solver.domains = {component: mask.copy() for component, mask in self.domains.items()} if domains is None else dict(domains)
+        for name in ("subtree_cost", "subtree_count", "child_cost", "child_count", "best_child", "above", "rest"):
+            if hasattr(self, name):
+                setattr(solver, name, {component: table.copy() for component, table in getattr(self, name).items()})
+        for name in ("key_tables", "above_tables"):
+            if hasattr(self, name):
+                setattr(solver, name, {component: tuple(table.copy() for table in tables)
+                                       for component, tables in getattr(self, name).items()})
+        if self._completions is not None:
+            solver._completions = {component: table.copy() for component, table in self._completions.items()}
+        return solver
+
+    def top_k(self, budget=None, k=None, partial_selection=None):
+        """
+        Yields the valid configurations in increasing cost order, as (cost, configuration) pairs.
+
+        Best-first search assigning the components in tree order: the priority of a partial
+        configuration is the cost of its cheapest completion (exact lower bound given by the
+        subtree tables), so complete configurations come out in cost order and branches
+        above the budget are never expanded. Results are produced lazily.
+
+        Arguments:
+        budget -- optional maximum total cost.
+        k -- optional maximum number of configurations (all of them when None).
+        partial_selection -- optional dictionary of components already fixed.
+        """
+        if partial_selection:
+            yield from self.restricted(partial_selection).top_k(budget, k)
+            return
+
+        columns = [self.order.index(component) for component in COMPONENTS]
+        for positions in self._search(budget, k):
+            configuration = {
+                component: int(self.catalog.ids[component][positions[column]])
+                for component, column in zip(COMPONENTS, columns)
+            }
+            yield self.catalog.cost(configuration), configuration
+
+    def solution_index(self, budget=None, k=None):
+        """
+        Returns the valid configurations within the budget (the `k` cheapest when given)
+        as a SolutionIndex: one row of ids per configuration, in increasing cost order.
+        """
+        positions = np.array(list(self._search(budget, k)), dtype=np.intp).reshape(-1, len(self.order))
+        rows = np.empty((len(positions), len(COMPONENTS)), dtype=np.int64)
+        for column, component in enumerate(COMPONENTS):
+            rows[:, column] = self.catalog.ids[component][positions[:, self.order.index(component)]]
+        return SolutionIndex(rows)
+
+    def _candidates(self, roots=None):
+        """
+        Helpers shared by the searches: the depth (in tree order) of the parent of every
+        level, and a function returning the values of a level compatible with the row of
+        their parent, by increasing subtree cost (positions and costs, cached per parent key).
+        The values of the root are limited to the positions `roots` when given.
+        """
+        order = self.order
+        parent_depth = [None] + [order.index(self.parent[component]) for component in order[1:]]
+        relations = [None] + [self.catalog.relation(self.parent[component], component) for component in order[1:]]
+        cache = [{} for _ in order]
+
+        def sorted_candidates(level, parent_pos):
+            key = None if level == 0 else relations[level].source_codes[parent_pos]
+            if key not in cache[level]:
+                subtree_cost = self.subtree_cost[order[level]]
+                if level == 0:
+                    values = np.arange(len(subtree_cost)) if roots is None else np.asarray(roots, dtype=np.intp)
+                else:
+                    values = relations[level].neighbours(parent_pos)
+                values = values[np.isfinite(subtree_cost[values])]
+                values = values[np.argsort(subtree_cost[values], kind="stable")]
+                cache[level][key] = (values.tolist(), subtree_cost[values].tolist())
+            return cache[level][key]
+
+        return parent_depth, sorted_candidates
+
+    def chunks(self, budget=None, size=65536, ordered=False):
+        """
+        Yields every valid configuration within the budget as arrays of catalog row
+        positions (one row per configuration, one column per component in COMPONENTS
+        order), at most `size` configurations at a time.
+
+        By default the configurations are enumerated depth first, in memory bounded by
+        the catalog and the chunk size whatever their number. With `ordered`, they come
+        in increasing cost order from the best-first search, whose heap grows with the
+        number of configurations produced.
+        """
+        columns = [self.order.index(component) for component in COMPONENTS]
+        configurations = self._search(budget) if ordered else self._enumerate(budget)
+        while True:
+            chunk = list(itertools.islice(configurations, size))
+            if not chunk:
+                return
+            yield np.array(chunk, dtype=np.intp).reshape(-1, len(self.order))[:, columns]
+
+    def _enumerate(self, budget=None):
+        """
+        Depth-first enumeration of the valid configurations within the budget, as tuples of
+        row positions in tree order. Values are tried by increasing subtree cost, so a
+        branch stops at the first value whose cheapest completion exceeds the budget.
+        """
+        limit = np.inf if budget is None else budget + 1e-9
+        order = self.order
+        depth = len(order)
+        parent_depth, sorted_candidates = self._candidates()
+
+        def extend(positions, bound):
+            level = len(positions)
+            if level == depth:
+                yield positions
+                return
+            parent_pos = positions[parent_depth[level]]
+            base = bound - self.child_cost[order[level]][parent_pos]
+            for pos, cost in zip(*sorted_candidates(level, parent_pos)):
+                if base + cost > limit:
+                    break
+                yield from extend(positions + (pos,), base + cost)
+
+        for pos, cost in zip(*sorted_candidates(0, None)):
+            if cost > limit:
+                break
+            yield from extend((pos,), cost)
+
+    def _search(self, budget=None, k=None, roots=None):
+        """
+        Best-first search behind `top_k`: yields the complete configurations in increasing
+        cost order, as tuples of row positions in tree order (only those starting from the
+        root positions `roots` when given).
+
+        The candidates of each component are sorted by the cost of their subtree, so a node
+        only pushes its cheapest child and its next sibling: the heap grows by at most two
+        entries per pop instead of one per compatible value. Ties are broken deepest first,
+        so configurations sharing the same cost come out without exploring all of them.
+        """
+        limit = np.inf if budget is None else budget + 1e-9
+        order = self.order
+        depth = len(order)
+        parent_depth, sorted_candidates = self._candidates(roots)
+
+        heap = []
+        counter = itertools.count()
+
+        def push(prefix, base, options, index):
+            # Pushes the index-th candidate after `prefix`, if it fits the budget
+            positions, costs = options
+            if index < len(positions) and base + costs[index] <= limit:
+                entry = (base + costs[index], -len(prefix), next(counter), prefix + (positions[index],), base, options, index)
+                heapq.heappush(heap, entry)
+
+        push((), 0.0, sorted_candidates(0, None), 0)
+
+        produced = 0
+        while heap and (k is None or produced < k):
+            if self.stats is not None:
+                self.stats.peak("top_k_heap_size", len(heap))
+            bound, _, _, positions, base, options, index = heapq.heappop(heap)
+            level = len(positions)
+            if self.stats is not None:
+                self.stats.count("top_k_popped", order[level - 1])
+            push(positions[:-1], base, options, index + 1)
+            if level == depth:
+                produced += 1
+                yield positions
+                continue
+
+            # Expand the next component, starting from its cheapest value
+            parent_pos = positions[parent_depth[level]]
+            child_base = bound - self.child_cost[order[level]][parent_pos]
+            push(positions, child_base, sorted_candidates(level, parent_pos), 0)
@@ -1,57 +1,72 @@
-import os
-import pandas as pd
+import csv
+
+import numpy as np
+
+from catalog import COMPONENTS
+from catalog_cache import load_cached_catalog, load_compiled
 
 def load_all_data(data_dir="data"):
     """
-    Loads all CSV files (CPUs, motherboards, RAM) as pandas DataFrames.
+    Loads all components (CPUs, motherboards, RAM...) as pandas DataFrames.
+    The data comes from the compiled catalog, recompiled automatically when a CSV file changes.
     Returns a dictionary with the data.
+    pandas is only imported here: the configurators and solvers work on the catalog.
     """
-    files = {
-        "CPU": "cpus.csv",
-        "Motherboard": "motherboards.csv",
-        "RAM": "ram.csv",
-        "GPU": "gpus.csv",
-        "PSU": "psus.csv",
-        "Case": "cases.csv"
-    }
+    import pandas as pd
+
+    arrays = load_compiled(data_dir)
 
     data = {}
-    for key, file_name in files.items():
-        file_path = os.path.join(data_dir, file_name)
-        data[key] = pd.read_csv(file_path)
+    for component in COMPONENTS:
+        columns = {}
+        for column in arrays[f"{component}/columns"].tolist():
+            values = arrays[f"{component}/column/{column}"]
+            if f"{component}/column/{column}/missing" in arrays:
+                values = values.astype(object)
+                values[arrays[f"{component}/column/{column}/missing"]] = np.nan
+            columns[column] = values
+        data[component] = pd.DataFrame(columns)
 
     return data
 
-def save_final_configuration(selected_config, data):
+def load_catalog(data_dir="data"):
+    """
+    Loads the indexed catalog shared by the configurators from the compiled catalog.
+    """
+    return load_cached_catalog(data_dir)
+
+def save_final_configuration(selected_config, catalog):
         """
         Sauvegarde la configuration finale dans un fichier CSV, incluant toutes les colonnes possibles
         et en supprimant les doublons.
         """
         # Récupérer toutes les colonnes uniques de tous les composants
         all_columns = set()
-        for df in data.values():
-            all_columns.update(df.columns)
+        for columns in catalog.columns.values():
+            all_columns.update(columns)
 
         # Assurer l'ordre souhaité des colonnes
         component_columns = ["Component", "id", "name"]  # Mettre "Component", "id" et "name" en premier
         other_columns = sorted(all_columns - set(component_columns))  # Trier les autres colonnes
         final_columns = component_columns + other_columns  # Fusionner dans l'ordre voulu
 
-        # Construire la configuration sous forme de DataFrame
-        config_list = []
+        # Construire les lignes de la configuration, sans doublons
+        config_rows = []
         for component, component_id in selected_config.items():
-            component_data = data[component].loc[data[component]["id"] == component_id].to_dict(orient="records")[0]
+            component_data = catalog.row(component, component_id)
 
-            # Ajouter toutes les colonnes manquantes avec "N/A"
+            # Ajouter toutes les colonnes manquantes avec "N/A" (cellules vides pour les valeurs manquantes)
             complete_data = {col: component_data.get(col, "N/A") for col in final_columns}
             complete_data["Component"] = component  # Ajouter une colonne pour identifier le type de composant
-            config_list.append(complete_data)
-
-        # Convertir en DataFrame et ordonner les colonnes correctement
-        df = pd.DataFrame(config_list, columns=final_columns).drop_duplicates()
+            row = tuple("" if value != value else value for value in (complete_data[col] for col in final_columns))
+            if row not in config_rows:
+                config_rows.append(row)
 
-        # Sauvegarde dans un fichier CSV
-        df.to_csv("final_configuration.csv", index=False)
+        # Sauvegarde dans un fichier CSV (module csv : pas besoin de pandas)
+        with open("final_configuration.csv", "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f, lineterminator="\n")
+            writer.writerow(final_columns)
+            writer.writerows(config_rows)
         print("📂 La configuration finale a été sauvegardée dans 'final_configuration.csv'.")
 
 # Printing DataFrames